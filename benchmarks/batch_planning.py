@@ -0,0 +1,44 @@
+# Batch planning throughput over the gen_paths queries for growing process counts.
+#
+#   python -m benchmarks.batch_planning [--processes 1 2 4 8] [--queries N]
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from d_star.batch import plan_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--queries', type=int, default=None)
+    parser.add_argument('--max-steps', type=int, default=100000)
+    args = parser.parse_args()
+
+    grid = np.load(os.path.join(ROOT, 'grid_with_static_obstacles.npy'))
+    # gen_paths rows: start_time, row_start, col_start, row_goal, col_goal, opt_time
+    queries = np.load(os.path.join(ROOT, 'src', 'gen_paths.npy'))[:args.queries, 1:5]
+
+    print("{n} queries on a {w}x{h} map, {c} cpus".format(
+        n=len(queries), w=grid.shape[0], h=grid.shape[1], c=os.cpu_count()))
+    print("{:>9} {:>10} {:>12} {:>9}".format('processes', 'seconds', 'queries/s', 'speedup'))
+
+    base = None
+    for processes in args.processes:
+        t = time.perf_counter()
+        paths, costs = plan_batch(grid, queries, processes=processes, max_steps=args.max_steps)
+        elapsed = time.perf_counter() - t
+        if base is None:
+            base = elapsed
+        print("{:>9} {:>10.2f} {:>12.1f} {:>9.2f}".format(processes, elapsed, len(queries) / elapsed, base / elapsed))
+
+    print("solved {s} of {n}".format(s=int(np.isfinite(costs).sum()), n=len(queries)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# Long-range queries: HierarchicalDStar against a flat GridDStar on the same map.
+#
+#   python -m benchmarks.hierarchical [--tiles N] [--queries N] [--cluster N] [--density P]
+#
+# The map is grid_with_static_obstacles.npy tiled N x N times, or, with --density,
+# a random map of the same size with that fraction of blocked cells. Every query
+# joins the two sampled free cells that lie furthest apart.
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.oracle import far_pair, free_cells
+from d_star.grid_d_star import GridDStar
+from d_star.hierarchical import HierarchicalDStar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def path_length(path):
+    return sum(np.hypot(a.x - b.x, a.y - b.y) for a, b in zip(path, path[1:]))
+
+
+def run(make, grid, queries):
+    times, lengths = [], []
+    for start, goal in queries:
+        t = time.perf_counter()
+        planner = make(grid, start, goal)
+        found = planner.replan()
+        times.append(time.perf_counter() - t)
+        lengths.append(path_length(planner.get_path()) if found else np.inf)
+    return np.array(times) * 1000, np.array(lengths)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tiles', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=5)
+    parser.add_argument('--cluster', type=int, default=8)
+    parser.add_argument('--corridor', type=int, default=1)
+    parser.add_argument('--density', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    grid = np.tile(np.load(os.path.join(ROOT, 'grid_with_static_obstacles.npy')), (args.tiles, args.tiles))
+    if args.density is not None:
+        grid = (rng.random(grid.shape) < args.density).astype(int)
+    queries = [far_pair(free_cells(grid, 20, rng)) for _ in range(args.queries)]
+
+    def flat(grid, start, goal):
+        planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+        planner.MAX_STEPS = grid.size * 8
+        return planner
+
+    def hierarchical(grid, start, goal):
+        return HierarchicalDStar.from_grid(grid, start[0], start[1], goal[0], goal[1],
+                                           cluster=args.cluster, corridor=args.corridor)
+
+    print("map {w}x{h}, {n} obstacles, {q} queries".format(
+        w=grid.shape[0], h=grid.shape[1], n=int(np.count_nonzero(grid)), q=len(queries)))
+    print("{:<14} {:>10} {:>10} {:>12}".format('planner', 'mean ms', 'max ms', 'path length'))
+
+    for name, make in (('flat', flat), ('hierarchical', hierarchical)):
+        times, lengths = run(make, grid, queries)
+        print("{:<14} {:>10.1f} {:>10.1f} {:>12.1f}".format(name, np.mean(times), np.max(times), np.mean(lengths)))
+
+
+if __name__ == '__main__':
+    main()
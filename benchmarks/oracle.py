@@ -0,0 +1,125 @@
+# Reference shortest paths for checking the planners: plain Dijkstra from the goal
+# over the same 8-connected cost model (moving out of a cell costs its cost, times
+# sqrt(2) on diagonals; negative cost means blocked, outside the map is blocked).
+# Also the maps, queries and planners that the benchmarks and tests check with it.
+
+import os
+from heapq import heappop, heappush
+from math import inf, sqrt
+
+import numpy as np
+
+from d_star.d_star import DStar
+from d_star.grid_d_star import GridDStar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+NEIGHBOURS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+
+def dijkstra(costs, goal):
+    # Cost of the cheapest path from every cell to goal, inf where there is none.
+    width, height = costs.shape
+    dist = np.full(costs.shape, inf)
+    dist[goal] = 0.
+    done = np.zeros(costs.shape, dtype=bool)
+    queue = [(0., goal)]
+
+    while queue:
+        d, (x, y) = heappop(queue)
+        if done[x, y]:
+            continue
+        done[x, y] = True
+
+        for dx, dy in NEIGHBOURS:
+            px, py = x + dx, y + dy
+            if not (0 <= px < width and 0 <= py < height) or done[px, py]:
+                continue
+            cost = costs[px, py]
+            if cost < 0:
+                continue
+            nd = d + (sqrt(2) if dx and dy else 1.) * cost
+            if nd < dist[px, py]:
+                dist[px, py] = nd
+                heappush(queue, (nd, (px, py)))
+    return dist
+
+
+def path_cost(costs, path):
+    # Cost of a list of (x, y) cells under the same model, inf if a step is not a
+    # move to a neighbour or leaves a blocked cell.
+    total = 0.
+    for (x, y), (nx, ny) in zip(path, path[1:]):
+        dx, dy = abs(nx - x), abs(ny - y)
+        if max(dx, dy) != 1 or costs[x, y] < 0:
+            return inf
+        total += (sqrt(2) if dx and dy else 1.) * costs[x, y]
+    return total
+
+
+def static_map(tiles=1):
+    # grid_with_static_obstacles.npy, tiled tiles x tiles times
+    grid = np.load(os.path.join(ROOT, 'grid_with_static_obstacles.npy'))
+    return np.tile(grid, (tiles, tiles))
+
+
+def random_map(size, density, rng):
+    grid = (rng.random((size, size)) < density).astype(int)
+    # a few long walls so that detours are not always local
+    for _ in range(size // 32):
+        x = rng.integers(0, size)
+        y0 = rng.integers(0, size // 2)
+        grid[x, y0:y0 + size // 2] = 1
+    return grid
+
+
+def largest_component(grid):
+    width, height = grid.shape
+    label = np.zeros(grid.shape, dtype=int)
+    sizes = [0]
+    for x, y in zip(*np.nonzero(grid == 0)):
+        if label[x, y]:
+            continue
+        sizes.append(0)
+        label[x, y] = len(sizes) - 1
+        stack = [(x, y)]
+        while stack:
+            cx, cy = stack.pop()
+            sizes[-1] += 1
+            for nx in range(max(cx - 1, 0), min(cx + 2, width)):
+                for ny in range(max(cy - 1, 0), min(cy + 2, height)):
+                    if not grid[nx, ny] and not label[nx, ny]:
+                        label[nx, ny] = len(sizes) - 1
+                        stack.append((nx, ny))
+    return label == int(np.argmax(sizes))
+
+
+def free_cells(grid, count, rng):
+    xs, ys = np.nonzero(largest_component(grid))
+    pick = rng.choice(len(xs), count, replace=False)
+    return list(zip(xs[pick].tolist(), ys[pick].tolist()))
+
+
+def far_pair(cells):
+    return max(((a, b) for a in cells for b in cells),
+               key=lambda p: abs(p[0][0] - p[1][0]) + abs(p[0][1] - p[1][1]))
+
+
+def make_dict_planner(grid, start, goal):
+    planner = DStar(start[0], start[1], goal[0], goal[1])
+    width, height = grid.shape
+    for x in range(-1, width + 1):
+        for y in range(-1, height + 1):
+            if x < 0 or y < 0 or x >= width or y >= height or grid[x, y]:
+                planner.update_cell(x, y, -1)
+    return planner
+
+
+def make_planner(engine, grid, start, goal, prune=False):
+    if engine == 'DStar':
+        planner = make_dict_planner(grid, start, goal)
+    else:
+        planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+    planner.MAX_STEPS = grid.size * 8
+    planner.set_pruning(prune)
+    return planner
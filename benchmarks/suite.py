@@ -0,0 +1,123 @@
+# Replanning benchmark with a correctness check: a robot walks its planned path on
+# a map that keeps changing, and every replan is timed and its path cost compared
+# with a Dijkstra oracle. The check also runs a twin planner fed the same start,
+# goal and moves as NumPy integers, as read from np.argwhere or gen_paths.npy,
+# and counts any path that differs from the main planner's as wrong.
+#
+#   python -m benchmarks.suite [--sizes 64 128 256] [--steps N] [--churn N] [--engines DStar GridDStar] [--prune]
+#
+# The maps are grid_with_static_obstacles.npy and random maps of the given sizes,
+# each with the two furthest apart of ten sampled free cells as start and goal.
+# Each step moves the start one cell along the path and toggles --churn random
+# cells between free and blocked. The first, full search is reported on its own,
+# the latency percentiles cover the repairs after it. Peak memory is measured on a second, identical
+# run under tracemalloc so it does not skew the timings. With --prune the last column
+# is the measured ratio of expansions without pruning to expansions with it.
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_planner, path_cost, random_map
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def run(engine, grid, start, goal, steps, churn, seed, check, prune=False):
+    rng = np.random.default_rng(seed)
+    costs = np.where(grid != 0, -1., 1.)
+    planner = make_planner(engine, grid, start, goal, prune)
+    stats = planner.enable_stats(per_call=False)
+    twin = make_planner(engine, grid, np.array(start), np.array(goal), prune) if check else None
+
+    latency, wrong = [], 0
+    for step in range(steps + 1):
+        if step:
+            path = planner.get_path()
+            if len(path) < 2:
+                break
+            start = (path[1].x, path[1].y)
+            planner.update_start(*start)
+            if twin is not None:
+                twin.update_start(*np.array(start))
+
+            xs, ys = rng.integers(0, grid.shape[0], churn), rng.integers(0, grid.shape[1], churn)
+            keep = [(x, y) not in (start, goal) for x, y in zip(xs.tolist(), ys.tolist())]
+            xs, ys = xs[keep], ys[keep]
+            costs[xs, ys] = np.where(costs[xs, ys] < 0, 1., -1.)
+            planner.update_cells(xs, ys, costs[xs, ys])
+            if twin is not None:
+                twin.update_cells(xs, ys, costs[xs, ys])
+
+        t = time.perf_counter()
+        found = planner.replan()
+        latency.append(time.perf_counter() - t)
+
+        if check:
+            best = dijkstra(costs, goal)[start]
+            cost = path_cost(costs, [(s.x, s.y) for s in planner.get_path()]) if found else np.inf
+            if found != (best < np.inf) or found and abs(cost - best) > 1e-6 * max(best, 1.):
+                wrong += 1
+            elif twin.replan() != found or twin.get_path() != planner.get_path():
+                wrong += 1
+
+    # the first replan is a full search, the rest are repairs
+    latency = np.array(latency) * 1000
+    return latency[0], latency[1:], stats.expansions / max(stats.search_time, 1e-9), stats.expansions, wrong
+
+
+def peak_memory(engine, grid, start, goal, steps, churn, seed, prune=False):
+    tracemalloc.start()
+    try:
+        run(engine, grid, start, goal, steps, churn, seed, check=False, prune=prune)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 128, 256])
+    parser.add_argument('--density', type=float, default=0.2)
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--churn', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', nargs='+', default=['DStar', 'GridDStar'])
+    parser.add_argument('--prune', action='store_true')
+    parser.add_argument('--no-check', action='store_true')
+    parser.add_argument('--no-memory', action='store_true')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    maps = [('static', np.load(os.path.join(ROOT, 'grid_with_static_obstacles.npy')))]
+    maps += [('random{s}'.format(s=size), random_map(size, args.density, rng)) for size in args.sizes]
+
+    print("{steps} steps, {churn} cells toggled per step".format(steps=args.steps, churn=args.churn))
+    print("{:<10} {:>9} {:<10} {:>10} {:>9} {:>8} {:>8} {:>8} {:>8} {:>9} {:>6} {:>9}".format(
+        'map', 'size', 'engine', 'exp/s', 'first ms', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'peak MB', 'wrong',
+        'pruned x'))
+
+    for name, grid in maps:
+        start, goal = far_pair(free_cells(grid, 10, rng))
+        for engine in args.engines:
+            first, latency, rate, expansions, wrong = run(engine, grid, start, goal, args.steps, args.churn,
+                                                          args.seed, check=not args.no_check, prune=args.prune)
+            # with --prune, how many times fewer expansions than the same run unpruned
+            ratio = '-'
+            if args.prune:
+                unpruned = run(engine, grid, start, goal, args.steps, args.churn, args.seed, check=False)[3]
+                ratio = '{r:.2f}'.format(r=unpruned / max(expansions, 1))
+            peak = np.nan if args.no_memory else \
+                peak_memory(engine, grid, start, goal, args.steps, args.churn, args.seed, args.prune) / 2 ** 20
+            latency = latency if len(latency) else np.array([np.nan])
+            print("{:<10} {:>9} {:<10} {:>10.0f} {:>9.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>9.2f} {:>6} {:>9}".format(
+                name, '{w}x{h}'.format(w=grid.shape[0], h=grid.shape[1]), engine, rate, first,
+                np.percentile(latency, 50), np.percentile(latency, 90), np.percentile(latency, 99),
+                latency.max(), peak, '-' if args.no_check else wrong, ratio))
+
+
+if __name__ == '__main__':
+    main()
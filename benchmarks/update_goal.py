@@ -0,0 +1,64 @@
+# Goal retargeting: incremental update_goal against the old clear-and-replay rebuild.
+#
+#   python -m benchmarks.update_goal [--tiles N] [--goals N] [--engines DStar GridDStar]
+#
+# The map is grid_with_static_obstacles.npy tiled N x N times.
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.oracle import free_cells, make_dict_planner
+from d_star.grid_d_star import GridDStar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def run(planner, goals, rebuild):
+    retarget, search = [], []
+    for x, y in goals:
+        t = time.perf_counter()
+        planner.update_goal(x, y, rebuild=rebuild)
+        retarget.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        planner.replan()
+        search.append(time.perf_counter() - t)
+    return np.array(retarget) * 1000, np.array(search) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tiles', type=int, default=1)
+    parser.add_argument('--goals', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', nargs='+', default=['DStar', 'GridDStar'])
+    args = parser.parse_args()
+
+    grid = np.tile(np.load(os.path.join(ROOT, 'grid_with_static_obstacles.npy')), (args.tiles, args.tiles))
+    rng = np.random.default_rng(args.seed)
+    cells = free_cells(grid, args.goals + 2, rng)
+    start, goal, goals = cells[0], cells[1], cells[2:]
+
+    print("map {w}x{h}, {n} obstacles, {g} goal changes".format(
+        w=grid.shape[0], h=grid.shape[1], n=int(np.count_nonzero(grid)), g=len(goals)))
+    print("{:<10} {:<12} {:>14} {:>14}".format('engine', 'mode', 'update_goal ms', 'replan ms'))
+
+    for engine in args.engines:
+        for rebuild in (True, False):
+            if engine == 'DStar':
+                planner = make_dict_planner(grid, start, goal)
+            else:
+                planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+            planner.MAX_STEPS = grid.size * 8
+            planner.replan()
+
+            retarget, search = run(planner, goals, rebuild)
+            print("{:<10} {:<12} {:>14.2f} {:>14.2f}".format(
+                engine, 'rebuild' if rebuild else 'incremental', np.mean(retarget), np.mean(search)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 import numpy as np
-from network import Config
+from network_config import Config
 import util
 import operator
 
@@ -4,17 +4,7 @@ import numpy as np
 import tensorflow as tf
 import time
 
-class Actions():
-    # Define 11 choices of actions to be:
-    # [v_pref,      [-pi/6, -pi/12, 0, pi/12, pi/6]]
-    # [0.5*v_pref,  [-pi/6, 0, pi/6]]
-    # [0,           [-pi/6, 0, pi/6]]
-    def __init__(self):
-        self.actions = np.mgrid[1.0:1.1:0.5, -np.pi/6:np.pi/6+0.01:np.pi/12].reshape(2, -1).T
-        self.actions = np.vstack([self.actions,np.mgrid[0.5:0.6:0.5, -np.pi/6:np.pi/6+0.01:np.pi/6].reshape(2, -1).T])
-        self.actions = np.vstack([self.actions,np.mgrid[0.0:0.1:0.5, -np.pi/6:np.pi/6+0.01:np.pi/6].reshape(2, -1).T])
-        self.num_actions = len(self.actions)
-
+from network_config import Actions, Config
 
 class NetworkVPCore(object):
     def __init__(self, device, model_name, num_actions):
@@ -53,6 +43,23 @@ class NetworkVPCore(object):
     def predict_p(self, x, audio):
         return self.sess.run(self.softmax_p, feed_dict={self.x: x})
 
+    def predict_batch(self, x, batch_size=None):
+        # Policy for many observations in as few sess.run calls as possible.
+        # x is one observation or a (N, NN_INPUT_SIZE) array of them, rows may see
+        # different numbers of other agents. Batches larger than batch_size are
+        # run in chunks of that size. Returns (N, num_actions) probabilities and
+        # the index of the best action for each row.
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = np.expand_dims(x, axis=0)
+        if batch_size is None:
+            batch_size = Config.PREDICT_BATCH_SIZE
+
+        probs = np.empty((len(x), self.num_actions), dtype=np.float32)
+        for i in range(0, len(x), batch_size):
+            probs[i:i+batch_size] = self.sess.run(self.softmax_p, feed_dict={self.x: x[i:i+batch_size]})
+        return probs, np.argmax(probs, axis=1)
+
     def simple_load(self, filename=None):
         if filename is None:
             print "[network.py] Didn't define simple_load filename"
@@ -98,80 +105,29 @@ class NetworkVP_rnn(NetworkVPCore):
         self._create_graph_outputs()
 
 
-class Config:
-    #########################################################################
-    # GENERAL PARAMETERS
-    NORMALIZE_INPUT     = True
-    USE_DROPOUT         = False
-    USE_REGULARIZATION  = True
-    ROBOT_MODE          = True
-    EVALUATE_MODE       = True
-
-    SENSING_HORIZON     = 8.0
-
-    MIN_POLICY = 1e-4
-
-    MAX_NUM_AGENTS_IN_ENVIRONMENT = 20
-    MULTI_AGENT_ARCH = 'RNN'
-
-    DEVICE                        = '/cpu:0' # Device
-
-    HOST_AGENT_OBSERVATION_LENGTH = 4 # dist to goal, heading to goal, pref speed, radius
-    OTHER_AGENT_OBSERVATION_LENGTH = 7 # other px, other py, other vx, other vy, other radius, combined radius, distance between
-    RNN_HELPER_LENGTH = 1 # num other agents
-    AGENT_ID_LENGTH = 1 # id
-    IS_ON_LENGTH = 1 # 0/1 binary flag
-
-    HOST_AGENT_AVG_VECTOR = np.array([0.0, 0.0, 1.0, 0.5]) # dist to goal, heading to goal, pref speed, radius
-    HOST_AGENT_STD_VECTOR = np.array([5.0, 3.14, 1.0, 1.0]) # dist to goal, heading to goal, pref speed, radius
-    OTHER_AGENT_AVG_VECTOR = np.array([0.0, 0.0, 0.0, 0.0, 0.5, 0.0, 1.0]) # other px, other py, other vx, other vy, other radius, combined radius, distance between
-    OTHER_AGENT_STD_VECTOR = np.array([5.0, 5.0, 1.0, 1.0, 1.0, 5.0, 1.0]) # other px, other py, other vx, other vy, other radius, combined radius, distance between
-    RNN_HELPER_AVG_VECTOR = np.array([0.0])
-    RNN_HELPER_STD_VECTOR = np.array([1.0])
-    IS_ON_AVG_VECTOR = np.array([0.0])
-    IS_ON_STD_VECTOR = np.array([1.0])
-
-    if MAX_NUM_AGENTS_IN_ENVIRONMENT > 2:
-        if MULTI_AGENT_ARCH == 'RNN':
-            # NN input:
-            # [num other agents, dist to goal, heading to goal, pref speed, radius, 
-            #   other px, other py, other vx, other vy, other radius, dist btwn, combined radius,
-            #   other px, other py, other vx, other vy, other radius, dist btwn, combined radius,
-            #   other px, other py, other vx, other vy, other radius, dist btwn, combined radius]
-            MAX_NUM_OTHER_AGENTS_OBSERVED = 10
-            OTHER_AGENT_FULL_OBSERVATION_LENGTH = OTHER_AGENT_OBSERVATION_LENGTH
-            HOST_AGENT_STATE_SIZE = HOST_AGENT_OBSERVATION_LENGTH
-            FULL_STATE_LENGTH = RNN_HELPER_LENGTH + HOST_AGENT_OBSERVATION_LENGTH + MAX_NUM_OTHER_AGENTS_OBSERVED * OTHER_AGENT_FULL_OBSERVATION_LENGTH
-            FIRST_STATE_INDEX = 1
-
-            NN_INPUT_AVG_VECTOR = np.hstack([RNN_HELPER_AVG_VECTOR,HOST_AGENT_AVG_VECTOR,np.tile(OTHER_AGENT_AVG_VECTOR,MAX_NUM_OTHER_AGENTS_OBSERVED)])
-            NN_INPUT_STD_VECTOR = np.hstack([RNN_HELPER_STD_VECTOR,HOST_AGENT_STD_VECTOR,np.tile(OTHER_AGENT_STD_VECTOR,MAX_NUM_OTHER_AGENTS_OBSERVED)])
-            
-    FULL_LABELED_STATE_LENGTH = FULL_STATE_LENGTH + AGENT_ID_LENGTH
-    NN_INPUT_SIZE = FULL_STATE_LENGTH
-
-
-
 if __name__ == '__main__':
     actions = Actions().actions
     num_actions = Actions().num_actions
     nn = NetworkVP_rnn(Config.DEVICE, 'network', num_actions)
     nn.simple_load()
 
-    obs = np.zeros((Config.FULL_STATE_LENGTH))
-    obs = np.expand_dims(obs, axis=0)
-
     num_queries = 10000
+    obs = np.zeros((num_queries, Config.FULL_STATE_LENGTH))
+    obs[:,0] = 10 # num other agents
+    obs[:,1] = np.random.uniform(0.5, 10.0, num_queries) # dist to goal
+    obs[:,2] = np.random.uniform(-np.pi, np.pi, num_queries) # heading to goal
+    obs[:,3] = np.random.uniform(0.2, 2.0, num_queries) # pref speed
+    obs[:,4] = np.random.uniform(0.2, 1.5, num_queries) # radius
+
     t_start = time.time()
     for i in range(num_queries):
-        obs[0,0] = 10 # num other agents
-        obs[0,1] = np.random.uniform(0.5, 10.0) # dist to goal
-        obs[0,2] = np.random.uniform(-np.pi, np.pi) # heading to goal
-        obs[0,3] = np.random.uniform(0.2, 2.0) # pref speed
-        obs[0,4] = np.random.uniform(0.2, 1.5) # radius
-        predictions = nn.predict_p(obs, None)[0]
+        predictions = nn.predict_p(obs[i:i+1], None)[0]
+    t_end = time.time()
+    print "one at a time:", num_queries / (t_end - t_start), "obs/sec"
+
+    t_start = time.time()
+    predictions, best = nn.predict_batch(obs)
     t_end = time.time()
-    print "avg query time:", (t_end - t_start)/num_queries
-    print "total time:", t_end - t_start
-    # action = actions[np.argmax(predictions)]
+    print "batched:", num_queries / (t_end - t_start), "obs/sec"
+    # action = actions[best[0]]
     # print "action:", action
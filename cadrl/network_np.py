@@ -0,0 +1,239 @@
+import struct
+import sys
+import time
+import numpy as np
+
+from network_config import Actions, Config
+
+# Reads TensorFlow checkpoints and runs NetworkVP_rnn with NumPy alone, so the
+# policy can be queried without importing TensorFlow or building a graph.
+#
+#   export_weights('../checkpoints/network_01900000', 'network_01900000.npz')
+#   nn = NetworkVP_np('network_01900000.npz')
+#   probs, best = nn.predict_batch(obs)
+
+TABLE_MAGIC = 0xdb4775248b80fb57
+DTYPES = {1: np.float32, 2: np.float64, 3: np.int32, 9: np.int64}
+
+
+def _varint(buf, i):
+    result = shift = 0
+    while True:
+        b = bytearray(buf[i:i+1])[0]
+        i += 1
+        result |= (b & 0x7f) << shift
+        shift += 7
+        if b < 0x80:
+            return result, i
+
+
+def _fields(buf):
+    # (field number, value) pairs of a serialized protobuf message
+    i = 0
+    while i < len(buf):
+        tag, i = _varint(buf, i)
+        wire = tag & 7
+        if wire == 0:
+            value, i = _varint(buf, i)
+        elif wire == 1:
+            value, i = buf[i:i+8], i + 8
+        elif wire == 2:
+            n, i = _varint(buf, i)
+            value, i = buf[i:i+n], i + n
+        elif wire == 5:
+            value, i = buf[i:i+4], i + 4
+        else:
+            raise ValueError("unsupported protobuf wire type %d" % wire)
+        yield tag >> 3, value
+
+
+def _block(buf, handle):
+    # (key, value) entries of one uncompressed table block
+    offset, i = _varint(handle, 0)
+    size, i = _varint(handle, i)
+    if bytearray(buf[offset+size:offset+size+1])[0] != 0:
+        raise ValueError("compressed checkpoint index blocks are not supported")
+    data = buf[offset:offset+size]
+    num_restarts = struct.unpack('<I', data[-4:])[0]
+    end = len(data) - 4 * (num_restarts + 1)
+
+    i, key = 0, b''
+    while i < end:
+        shared, i = _varint(data, i)
+        unshared, i = _varint(data, i)
+        n, i = _varint(data, i)
+        key = key[:shared] + data[i:i+unshared]
+        i += unshared
+        yield key, data[i:i+n]
+        i += n
+
+
+def read_checkpoint(prefix):
+    # All tensors of a TensorFlow checkpoint (prefix.index plus its data shards) as
+    # a dict of arrays keyed by the names the Saver stored them under.
+    with open(prefix + '.index', 'rb') as f:
+        index = f.read()
+    footer = index[-48:]
+    if struct.unpack('<Q', footer[-8:])[0] != TABLE_MAGIC:
+        raise ValueError("%s.index is not a TensorFlow checkpoint index" % prefix)
+    _, i = _varint(footer, 0)
+    _, i = _varint(footer, i)
+
+    entries = {}
+    num_shards = 1
+    for _, handle in _block(index, footer[i:]):
+        for key, value in _block(index, handle):
+            fields = dict(_fields(value))
+            if not key:
+                # the header, field 1 is the number of shards
+                num_shards = fields.get(1, 1)
+                continue
+            shape = [dict(_fields(dim)).get(1, 0) for number, dim in _fields(fields.get(2, b'')) if number == 2]
+            entries[key.decode('utf-8')] = (fields.get(1), shape, fields.get(3, 0), fields.get(4, 0), fields.get(5, 0))
+
+    shards = {}
+    tensors = {}
+    for name, (dtype, shape, shard, offset, size) in entries.items():
+        if dtype not in DTYPES:
+            raise ValueError("%s has unsupported dtype %s" % (name, dtype))
+        if shard not in shards:
+            with open('%s.data-%05d-of-%05d' % (prefix, shard, num_shards), 'rb') as f:
+                shards[shard] = f.read()
+        data = shards[shard][offset:offset+size]
+        tensors[name] = np.frombuffer(data, dtype=np.dtype(DTYPES[dtype]).newbyteorder('<')).reshape(shape)
+    return tensors
+
+
+def export_weights(prefix, filename):
+    # Writes the trained variables of a checkpoint to filename with np.savez, named
+    # like the graph's layers ('layer1/kernel', 'rnn/lstm_cell/bias', ...). The
+    # optimizer's slots and counters are left out.
+    tensors = read_checkpoint(prefix)
+    weights = {}
+    for name, value in tensors.items():
+        name = name.split(':')[0]
+        if name.endswith('/Adam') or name.endswith('/Adam_1') or name.endswith('_power') or name == 'step':
+            continue
+        weights[name] = value
+    np.savez(filename, **weights)
+    return sorted(weights)
+
+
+class NetworkVP_np(object):
+    # NetworkVP_rnn's softmax_p in NumPy: input normalization, the LSTM over the
+    # other agents (stopping at each row's own number of agents, like dynamic_rnn
+    # with sequence_length), layer1, layer2, fullyconnected1 and logits_p, then
+    # the MIN_POLICY floor. Works in float32 like the TF graph.
+    def __init__(self, filename, num_actions=None):
+        weights = np.load(filename)
+        w = dict((name, np.asarray(weights[name], dtype=np.float32)) for name in weights.files)
+
+        self.avg_vec = Config.NN_INPUT_AVG_VECTOR.astype(np.float32)
+        self.std_vec = Config.NN_INPUT_STD_VECTOR.astype(np.float32)
+
+        kernel, bias = w['rnn/lstm_cell/kernel'], w['rnn/lstm_cell/bias'].copy()
+        self.num_hidden = kernel.shape[1] // 4
+        self.lstm_kernel_x = kernel[:Config.OTHER_AGENT_FULL_OBSERVATION_LENGTH]
+        self.lstm_kernel_h = kernel[Config.OTHER_AGENT_FULL_OBSERVATION_LENGTH:]
+        # gates come in i, j, f, o order; LSTMCell adds forget_bias=1 to f
+        bias[2*self.num_hidden:3*self.num_hidden] += 1.0
+        self.lstm_bias = bias
+
+        self.layers = [(w[name + '/kernel'], w[name + '/bias']) for name in ('layer1', 'layer2', 'fullyconnected1')]
+        self.logits_kernel, self.logits_bias = w['logits_p/kernel'], w['logits_p/bias']
+        self.num_actions = self.logits_bias.shape[0] if num_actions is None else num_actions
+
+    def _lstm(self, seq, lengths):
+        # rows sorted by length, longest first, so the rows still running at step
+        # t are always the first k
+        order = np.argsort(-lengths, kind='mergesort')
+        seq, lengths = seq[order], lengths[order]
+
+        n = self.num_hidden
+        h = np.zeros((len(seq), n), dtype=np.float32)
+        c = np.zeros((len(seq), n), dtype=np.float32)
+        # sigmoid(z) written as 0.5 * tanh(z / 2) + 0.5, which can't overflow
+        for t in range(seq.shape[1]):
+            k = np.count_nonzero(lengths > t)
+            if k == 0:
+                break
+            gates = np.dot(seq[:k, t], self.lstm_kernel_x) + np.dot(h[:k], self.lstm_kernel_h) + self.lstm_bias
+            i = 0.5 * np.tanh(0.5 * gates[:, :n]) + 0.5
+            j = np.tanh(gates[:, n:2*n])
+            f = 0.5 * np.tanh(0.5 * gates[:, 2*n:3*n]) + 0.5
+            o = 0.5 * np.tanh(0.5 * gates[:, 3*n:]) + 0.5
+            c[:k] = f * c[:k] + i * j
+            h[:k] = o * np.tanh(c[:k])
+
+        out = np.empty_like(h)
+        out[order] = h
+        return out
+
+    def _softmax_p(self, x):
+        if Config.NORMALIZE_INPUT:
+            x_normalized = (x - self.avg_vec) / self.std_vec
+        else:
+            x_normalized = x
+
+        # dynamic_rnn casts sequence_length to int32, i.e. truncates
+        lengths = np.clip(x[:, 0].astype(np.int32), 0, Config.MAX_NUM_OTHER_AGENTS_OBSERVED)
+        host = x_normalized[:, Config.FIRST_STATE_INDEX:Config.HOST_AGENT_STATE_SIZE+Config.FIRST_STATE_INDEX]
+        other = x_normalized[:, Config.HOST_AGENT_STATE_SIZE+Config.FIRST_STATE_INDEX:]
+        seq = other.reshape(-1, Config.MAX_NUM_OTHER_AGENTS_OBSERVED, Config.OTHER_AGENT_FULL_OBSERVATION_LENGTH)
+
+        out = np.hstack([host, self._lstm(seq, lengths)])
+        for kernel, bias in self.layers:
+            out = np.maximum(np.dot(out, kernel) + bias, 0)
+        logits = np.dot(out, self.logits_kernel) + self.logits_bias
+
+        p = np.exp(logits - logits.max(axis=1, keepdims=True))
+        p /= p.sum(axis=1, keepdims=True)
+        return (p + Config.MIN_POLICY) / (1.0 + Config.MIN_POLICY * self.num_actions)
+
+    def predict_p(self, x, audio=None):
+        return self._softmax_p(np.asarray(x, dtype=np.float32))
+
+    def predict_batch(self, x, batch_size=None):
+        # Same as NetworkVPCore.predict_batch: probabilities and argmax action
+        # for one observation or a (N, NN_INPUT_SIZE) array, in chunks of
+        # batch_size rows.
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = np.expand_dims(x, axis=0)
+        if batch_size is None:
+            batch_size = Config.PREDICT_BATCH_SIZE
+
+        probs = np.empty((len(x), self.num_actions), dtype=np.float32)
+        for i in range(0, len(x), batch_size):
+            probs[i:i+batch_size] = self._softmax_p(x[i:i+batch_size])
+        return probs, np.argmax(probs, axis=1)
+
+
+if __name__ == '__main__':
+    # python network_np.py <checkpoint prefix> <weights.npz> exports the weights and
+    # times the NumPy network on them
+    prefix, filename = sys.argv[1:3]
+    export_weights(prefix, filename)
+
+    t_start = time.time()
+    nn = NetworkVP_np(filename, Actions().num_actions)
+    print("load time: %f" % (time.time() - t_start))
+
+    num_queries = 10000
+    obs = np.zeros((num_queries, Config.FULL_STATE_LENGTH))
+    obs[:,0] = 10 # num other agents
+    obs[:,1] = np.random.uniform(0.5, 10.0, num_queries) # dist to goal
+    obs[:,2] = np.random.uniform(-np.pi, np.pi, num_queries) # heading to goal
+    obs[:,3] = np.random.uniform(0.2, 2.0, num_queries) # pref speed
+    obs[:,4] = np.random.uniform(0.2, 1.5, num_queries) # radius
+
+    t_start = time.time()
+    for i in range(num_queries):
+        predictions = nn.predict_p(obs[i:i+1])[0]
+    t_end = time.time()
+    print("one at a time: %f obs/sec" % (num_queries / (t_end - t_start)))
+
+    t_start = time.time()
+    predictions, best = nn.predict_batch(obs)
+    t_end = time.time()
+    print("batched: %f obs/sec" % (num_queries / (t_end - t_start)))
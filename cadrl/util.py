@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as ptch
-from network import Config
+from network_config import Config
 
 # angle_1 - angle_2
 # contains direction in range [-3.14, 3.14]
@@ -0,0 +1,210 @@
+from math import ceil, inf
+from threading import Condition, Thread
+
+from d_star.d_star import DStar
+
+
+class PlanResult:
+    # One finished search, never changed after it is published. version is the
+    # number of inputs it accounts for: every update_* call up to and including
+    # the one that returned that number.
+    __slots__ = ('version', 'start', 'goal', 'path', 'cost', 'found')
+
+    def __init__(self, version, start, goal, path, cost, found):
+        self.version = version
+        self.start = start
+        self.goal = goal
+        self.path = path
+        self.cost = cost
+        self.found = found
+
+    def __repr__(self):
+        return "PlanResult: version {v}, {n} states, cost {c}".format(v=self.version, n=len(self.path), c=self.cost)
+
+
+class BackgroundPlanner:
+    # Runs replan for a planner (DStar or any subclass) on its own thread.
+    # update_start / update_goal / update_cell / update_cells may be called from any
+    # thread and only queue the change. Changes that arrive while a search runs are
+    # coalesced: the latest start and goal, the last cost for each cell. Between
+    # two searches the worker applies them in that order - start, goal, costs -
+    # and replans. Costs go last because the planner ignores changes to the start
+    # and goal cells: applied first, a cost for the cell the robot just left would
+    # be dropped. A search is run in slices of max_steps expansions or time_budget
+    # seconds, and new changes are picked up between slices, so a stream of updates
+    # never waits for a search it has already made stale.
+    # Without either budget a search gets one slice of the planner's MAX_STEPS, as a
+    # plain replan would. With one, it gets at most max_slices slices per input
+    # version, by default as many as add up to MAX_STEPS expansions (a time_budget
+    # slice pops at least 16 cells). A search that uses them up is published as not
+    # found, just as when replan gives up, and is not resumed until the next input.
+    # latest() returns the last finished PlanResult. Results are swapped in whole
+    # under the lock and only the worker ever touches the planner, so readers never
+    # see a half-updated planner.
+    # If applying the changes or the search raises, the worker keeps the exception
+    # in error, with the last input version it was handling in failed, until its
+    # next successful result. wait() raises it for the inputs it covers.
+
+    def __init__(self, planner, max_steps=None, time_budget=None, max_slices=None):
+        self.planner = planner
+        self.max_steps = max_steps
+        self.time_budget = time_budget
+        self.max_slices = max_slices
+
+        self.cond = Condition()
+        self.version = 0
+        self.start = None
+        self.goal = None
+        self.costs = {}
+        self.queued = False
+        self.stopping = False
+        self.error = None
+        self.failed = 0
+        self.result = None
+        self.thread = None
+
+    def __enter__(self):
+        self.run()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def run(self):
+        # Starts the worker; it plans once right away for the planner's current state.
+        with self.cond:
+            if self.thread is not None:
+                return
+            self.stopping = False
+            self.queued = True
+            self.thread = Thread(target=self.work, name='d_star-replan', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        with self.cond:
+            thread = self.thread
+            self.stopping = True
+            self.cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self.cond:
+            self.thread = None
+
+    def queue(self):
+        # call with the lock held
+        self.version += 1
+        self.queued = True
+        self.cond.notify_all()
+        return self.version
+
+    def update_start(self, x, y):
+        with self.cond:
+            self.start = (x, y)
+            return self.queue()
+
+    def update_goal(self, x, y):
+        with self.cond:
+            self.goal = (x, y)
+            return self.queue()
+
+    def update_cell(self, x, y, val):
+        with self.cond:
+            self.costs[(x, y)] = val
+            return self.queue()
+
+    def update_cells(self, xs, ys, vals):
+        xs, ys, vals = DStar.cell_batch(xs, ys, vals)
+        with self.cond:
+            for x, y, val in zip(xs.tolist(), ys.tolist(), vals.tolist()):
+                self.costs[(x, y)] = val
+            return self.queue()
+
+    def replan(self):
+        # Asks for a search without changing anything, e.g. after the wrapped planner
+        # was set up before run().
+        with self.cond:
+            return self.queue()
+
+    def latest(self):
+        with self.cond:
+            return self.result
+
+    def wait(self, version=None, timeout=None):
+        # Blocks until a result covering version (by default every input so far) is
+        # published, and returns the latest result, or None on timeout. Raises the
+        # worker's exception if it failed before getting there.
+        with self.cond:
+            if version is None:
+                version = self.version
+
+            def covered():
+                return self.result is not None and self.result.version >= version
+
+            def failed():
+                return self.error is not None and self.failed >= version
+
+            done = self.cond.wait_for(lambda: covered() or failed() or self.stopping, timeout)
+            if not covered() and failed():
+                raise self.error
+            return self.result if done else None
+
+    def take(self):
+        # call with the lock held; hands the coalesced changes to the worker
+        start, goal, costs = self.start, self.goal, self.costs
+        self.start, self.goal, self.costs = None, None, {}
+        self.queued = False
+        return self.version, start, goal, costs
+
+    def apply(self, start, goal, costs):
+        planner = self.planner
+        if start is not None:
+            planner.update_start(*start)
+        if goal is not None:
+            planner.update_goal(*goal)
+        if costs:
+            xs, ys = zip(*costs)
+            planner.update_cells(xs, ys, list(costs.values()))
+
+    def slice_limit(self):
+        if self.max_slices is not None:
+            return self.max_slices
+        if self.max_steps is None and self.time_budget is None:
+            return 1
+        return ceil(self.planner.MAX_STEPS / (self.max_steps or 16))
+
+    def work(self):
+        planner = self.planner
+        slices = 0
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.stopping or self.queued or planner.pending)
+                if self.stopping:
+                    return
+                if self.queued:
+                    slices = 0
+                version, start, goal, costs = self.take()
+
+            try:
+                self.apply(start, goal, costs)
+                found = planner.replan(self.max_steps, self.time_budget)
+            except Exception as e:
+                with self.cond:
+                    self.error = e
+                    self.failed = version
+                    self.cond.notify_all()
+                continue
+
+            slices += 1
+            if planner.pending:
+                if slices < self.slice_limit():
+                    continue
+                # out of effort for this version: give up on it like replan does
+                planner.pending = False
+
+            s_start, s_goal = planner.s_start, planner.s_goal
+            result = PlanResult(version, (s_start.x, s_start.y), (s_goal.x, s_goal.y), tuple(planner.get_path()),
+                                planner.get_g(s_start) if found else inf, found)
+            with self.cond:
+                self.result = result
+                self.error = None
+                self.cond.notify_all()
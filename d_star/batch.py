@@ -0,0 +1,67 @@
+from math import inf
+from multiprocessing import Pool, shared_memory
+import os
+
+import numpy as np
+
+from d_star.grid_d_star import GridDStar
+
+# Set in every worker by attach(): the shared cost array and the planner settings.
+shared = {}
+
+
+def attach(name, shape, max_steps):
+    block = shared_memory.SharedMemory(name=name)
+    costs = np.ndarray(shape, dtype=float, buffer=block.buf)
+    costs.flags.writeable = False
+
+    shared['block'] = block
+    shared['costs'] = costs
+    shared['max_steps'] = max_steps
+
+
+def plan_one(query):
+    x_start, y_start, x_goal, y_goal = query
+    planner = GridDStar.from_grid(shared['costs'], x_start, y_start, x_goal, y_goal, occupancy=False)
+    if shared['max_steps'] is not None:
+        planner.MAX_STEPS = shared['max_steps']
+
+    if not planner.replan():
+        return None, inf
+    return [(s.x, s.y) for s in planner.get_path()], planner.get_g(planner.s_start)
+
+
+def plan_batch(grid, queries, processes=None, inflation=0, occupancy=True, max_steps=None, chunksize=None):
+    # Plans every (x_start, y_start, x_goal, y_goal) row of queries against one static
+    # map. The cost grid is built once and shared with the worker processes through
+    # shared memory, so each worker maps it instead of receiving a pickled copy.
+    # Returns the paths (lists of (x, y), None when no path was found) and an array
+    # of path costs (inf when no path was found), both in input order.
+    queries = [tuple(int(v) for v in q) for q in np.asarray(queries).reshape(-1, 4)]
+
+    costs = GridDStar.costs_from_grid(grid, inflation, occupancy)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, max(len(queries), 1))
+
+    if processes <= 1:
+        shared.update(costs=costs, max_steps=max_steps)
+        try:
+            results = [plan_one(q) for q in queries]
+        finally:
+            shared.clear()
+    else:
+        block = shared_memory.SharedMemory(create=True, size=costs.nbytes)
+        try:
+            np.ndarray(costs.shape, dtype=float, buffer=block.buf)[:] = costs
+            if chunksize is None:
+                chunksize = max(1, len(queries) // (processes * 4))
+            with Pool(processes, initializer=attach, initargs=(block.name, costs.shape, max_steps)) as pool:
+                results = pool.map(plan_one, queries, chunksize)
+        finally:
+            block.close()
+            block.unlink()
+
+    paths = [path for path, _ in results]
+    return paths, np.array([cost for _, cost in results])
@@ -1,4 +1,6 @@
 class CellInfo:
+    __slots__ = ('g', 'rhs', 'cost')
+
     def __init__(self, g=0., rhs=0., cost=0.):
         self.g = g
         self.rhs = rhs
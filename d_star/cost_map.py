@@ -0,0 +1,135 @@
+from collections import deque
+
+import numpy as np
+
+from d_star.grid_d_star import GridDStar
+
+
+class CostMap:
+    # One bounded cost map for any number of planners. The costs live in a single
+    # array, padded with blocked cells like GridDStar's, that SharedGridDStar
+    # planners use as their own costs instead of keeping a copy. Every
+    # update_cells that changes something bumps version and logs the ids of the
+    # changed cells, so a planner only has to look at what changed since the last
+    # version it saw. The log keeps about log_size cell ids; a planner that falls
+    # further behind than that reseeds from the whole map instead.
+    # Nothing here is locked: update and plan from one thread, or wrap the planners
+    # in BackgroundPlanner and only touch the map from its worker.
+
+    LOG_SIZE = 1 << 20
+
+    def __init__(self, costs, log_size=None):
+        costs = np.asarray(costs, dtype=float)
+        self.width, self.height = costs.shape
+        self.stride = self.height + 2
+
+        self.padded = np.full((self.width + 2, self.height + 2), -1.)
+        self.padded[1:-1, 1:-1] = costs
+        self.costs = self.padded[1:-1, 1:-1]
+        self.flat = self.padded.reshape(-1)
+
+        self.log_size = self.LOG_SIZE if log_size is None else log_size
+        self.version = 0
+        self.log = deque()
+        self.logged = 0
+        # versions up to floor have been dropped from the log
+        self.floor = 0
+
+    @classmethod
+    def from_grid(cls, grid, inflation=0, occupancy=True, log_size=None):
+        return cls(GridDStar.costs_from_grid(grid, inflation, occupancy), log_size)
+
+    def planner(self, x_start, y_start, x_goal, y_goal):
+        return SharedGridDStar(self, x_start, y_start, x_goal, y_goal)
+
+    def update_cell(self, x, y, val):
+        return self.update_cells([x], [y], [val])
+
+    def update_cells(self, xs, ys, vals):
+        # Returns the number of cells whose cost changed.
+        xs, ys, vals = GridDStar.cell_batch(xs, ys, vals, (self.width, self.height))
+        cells = (xs + 1) * self.stride + ys + 1
+
+        changed = self.flat[cells] != vals
+        cells = cells[changed]
+        if not len(cells):
+            return 0
+
+        self.flat[cells] = vals[changed]
+        self.version += 1
+        self.log.append((self.version, cells))
+        self.logged += len(cells)
+        while self.logged > self.log_size and len(self.log) > 1:
+            self.floor, dropped = self.log.popleft()
+            self.logged -= len(dropped)
+        return len(cells)
+
+    def changes_since(self, version):
+        # Ids of the cells changed after version, or None if the log no longer goes
+        # back that far.
+        if version < self.floor:
+            return None
+
+        batches = []
+        for v, cells in reversed(self.log):
+            if v <= version:
+                break
+            batches.append(cells)
+        if not batches:
+            return np.empty(0, dtype=int)
+        return np.unique(np.concatenate(batches))
+
+
+class SharedGridDStar(GridDStar):
+    # GridDStar reading its costs from a CostMap. Only g, rhs and the search state
+    # are its own. Before each search it pulls the cells changed since the map
+    # version it last saw and repairs just those. Cost changes go to the map,
+    # update_cell / update_cells on the planner forward them there.
+    # Unlike GridDStar the start and goal cells are not forced free: the map is
+    # shared, so a blocked start simply has no path.
+
+    def __init__(self, cost_map, x_start, y_start, x_goal, y_goal):
+        self.cost_map = cost_map
+        super().__init__(cost_map.width, cost_map.height, x_start, y_start, x_goal, y_goal)
+        self.seed_from_costs()
+
+    def make_costs(self):
+        return self.cost_map.padded
+
+    def seed_from_costs(self):
+        self.version = self.cost_map.version
+        super().seed_from_costs()
+
+    def sync(self):
+        cells = self.cost_map.changes_since(self.version)
+        if cells is None:
+            self.seed_from_costs()
+            return
+
+        self.version = self.cost_map.version
+        cells = cells[~np.isin(cells, list(self.goals))]
+        if len(cells):
+            self.repair_cells(cells)
+
+    def compute_shortest_path(self, max_steps=None, time_budget=None):
+        self.sync()
+        return super().compute_shortest_path(max_steps, time_budget)
+
+    def update_cell(self, x, y, val):
+        return self.cost_map.update_cell(x, y, val)
+
+    def update_cells(self, xs, ys, vals):
+        return self.cost_map.update_cells(xs, ys, vals)
+
+    def update_goal(self, x, y, rebuild=False):
+        if not self.in_bounds(x, y):
+            raise ValueError("goal must lie inside the {w}x{h} grid".format(w=self.width, h=self.height))
+
+        self.s_goal.x = int(x)
+        self.s_goal.y = int(y)
+        self.goal = self.cell(x, y)
+        self.goals = {self.goal}
+        self.seed_from_costs()
+
+    def snapshot(self):
+        raise TypeError("a SharedGridDStar doesn't own its costs, save the CostMap's costs instead")
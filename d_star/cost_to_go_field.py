@@ -0,0 +1,162 @@
+from time import perf_counter
+
+import numpy as np
+
+from d_star.grid_d_star import GridDStar
+from d_star.state import State
+
+
+class CostToGoField(GridDStar):
+    # Cost to the nearest of a set of goal cells, for every cell of the map at once.
+    # The search is not focused on a start: keys leave out the heuristic and
+    # compute_shortest_path runs until the open list is empty, so every reachable
+    # cell ends with its exact cost-to-go. Any number of robots can then query
+    # next_step_from / path_from, which only walk the field downhill and cost
+    # O(path length). update_cell / update_cells repair the field incrementally on
+    # the next query.
+    # s_start is the first goal and only matters to the inherited replan /
+    # iter_path, which walk from it like path_from does.
+
+    def __init__(self, width, height, goals):
+        self.goal_list = [(int(x), int(y)) for x, y in goals]
+        if not self.goal_list:
+            raise ValueError("at least one goal is needed")
+
+        self.width = width
+        self.height = height
+        for x, y in self.goal_list:
+            if not self.in_bounds(x, y):
+                raise ValueError("goals must lie inside the {w}x{h} grid".format(w=width, h=height))
+
+        x, y = self.goal_list[0]
+        super().__init__(width, height, x, y, x, y)
+
+    @classmethod
+    def from_grid(cls, grid, goals, inflation=0, occupancy=True):
+        costs = cls.costs_from_grid(grid, inflation, occupancy)
+        width, height = costs.shape
+        field = cls(width, height, goals)
+
+        for x, y in field.goal_list:
+            costs[x, y] = cls.STRAIGHT_DIST
+        field.costs[1:-1, 1:-1] = costs
+        field.seed_from_costs()
+        return field
+
+    def clear_fields(self):
+        super().clear_fields()
+        self.goals = {self.cell(x, y) for x, y in self.goal_list}
+        self.rhs_flat[list(self.goals)] = 0
+
+    def snapshot(self):
+        blocks = super().snapshot()
+        blocks['goal_list'] = np.array(self.goal_list).reshape(-1, 2)
+        return blocks
+
+    def restore(self, blocks):
+        self.goal_list = [(x, y) for x, y in blocks['goal_list'].tolist()]
+        super().restore(blocks)
+
+    def heuristic_grid(self, s):
+        # distance to the nearest goal, whatever s is
+        h = None
+        for x, y in self.goal_list:
+            d = super().heuristic_grid(State(x, y))
+            h = d if h is None else np.minimum(h, d)
+        return h
+
+    def key(self, c):
+        val = min(self.rhs_at(c), self.g_at(c))
+        return round(val, self.KEY_DIGITS), val
+
+    def keys_cells(self, xs, ys, g, rhs):
+        k2 = np.minimum(g, rhs)
+        return [(round(a, self.KEY_DIGITS), a) for a in k2.tolist()]
+
+    def update_goal(self, x, y, rebuild=False):
+        raise TypeError("a CostToGoField has a fixed goal set, build a new one instead")
+
+    def compute_shortest_path(self, max_steps=None, time_budget=None):
+        # Settles the whole field. Unlike DStar there is no step limit unless
+        # max_steps is given; returns 0 when done and -1 if a budget ran out, in
+        # which case the next call continues. As in DStar the clock is first read
+        # after 16 pops, so every call makes progress.
+        stats = self.stats
+        if stats is not None:
+            began = perf_counter()
+
+        if not self.pending:
+            self.begin_search()
+
+        deadline = None if time_budget is None else perf_counter() + time_budget
+
+        k = 0
+        stale = 0
+        abort = None
+        open_list = self.open_list
+        while not open_list.empty():
+            if max_steps is not None and k > max_steps:
+                abort = 'max_steps'
+            elif deadline is not None and k and k % 16 == 0 and perf_counter() > deadline:
+                abort = 'time_budget'
+            if abort is not None:
+                break
+            k += 1
+
+            c, k_old = open_list.pop()
+            k_new = self.key(c)
+            if k_old < k_new:
+                open_list.push(c, k_new)
+                stale += 1
+            else:
+                self.expand(c)
+
+        self.pending = abort is not None
+
+        # Nothing here trims a cached path cell by cell, so dirty would only grow to
+        # cover the whole field; drop it, and the path it would have trimmed, instead.
+        if self.dirty:
+            self.dirty.clear()
+            self.path = []
+
+        if stats is not None:
+            stats.expansions += k - stale
+            stats.stale_pops += stale
+            stats.pushes += stale
+            stats.abort = abort
+            stats.search_time += perf_counter() - began
+        return -1 if self.pending else 0
+
+    def cost_to_go(self, x, y):
+        if not self.in_bounds(x, y):
+            return np.inf
+        if self.marks:
+            self.expire()
+        self.compute_shortest_path()
+        return self.g_at(self.cell(x, y))
+
+    def path_from(self, x, y):
+        # Path from (x, y) to the nearest goal as a list of States, empty if there is
+        # none.
+        if self.cost_to_go(x, y) == np.inf:
+            return []
+
+        c = self.cell(x, y)
+        path = [c]
+        while c not in self.goals:
+            c = self.next_state(c)
+            # g strictly drops along the path unless there are zero cost cells
+            if c is None or len(path) > self.g.size:
+                return []
+            path.append(c)
+        return [State(*self.coords(c)) for c in path]
+
+    def next_step_from(self, x, y):
+        if self.cost_to_go(x, y) == np.inf:
+            return None
+
+        c = self.cell(x, y)
+        if c in self.goals:
+            return None
+        c = self.next_state(c)
+        return None if c is None else State(*self.coords(c))
@@ -0,0 +1,273 @@
+import numpy as np
+from math import inf
+from d_star.d_star import DStar
+from d_star.state import State
+
+
+class GridDStar(DStar):
+    # Dense variant of DStar for bounded maps: g, rhs and cost live in preallocated
+    # arrays instead of CellInfo objects in cell_hash. The arrays carry a one cell
+    # border of blocked cells, so cells outside [0, width) x [0, height) are occupied.
+    # A cell id is the flat index into those padded arrays.
+
+    def __init__(self, width, height, x_start, y_start, x_goal, y_goal):
+        self.width = width
+        self.height = height
+        self.stride = height + 2
+
+        if not self.in_bounds(x_start, y_start) or not self.in_bounds(x_goal, y_goal):
+            raise ValueError("start and goal must lie inside the {w}x{h} grid".format(w=width, h=height))
+
+        super().__init__(x_start, y_start, x_goal, y_goal)
+
+    @classmethod
+    def from_grid(cls, grid, x_start, y_start, x_goal, y_goal, inflation=0, occupancy=True):
+        # Builds a planner for a whole map in one pass. With occupancy=True any nonzero
+        # cell of grid is an obstacle, otherwise grid holds the costs themselves.
+        # Obstacles are grown by a disk of inflation cells.
+        costs = cls.costs_from_grid(grid, inflation, occupancy)
+        width, height = costs.shape
+        planner = cls(width, height, x_start, y_start, x_goal, y_goal)
+
+        costs[x_start, y_start] = costs[x_goal, y_goal] = cls.STRAIGHT_DIST
+        planner.costs[1:-1, 1:-1] = costs
+        planner.seed_from_costs()
+        return planner
+
+    @classmethod
+    def costs_from_grid(cls, grid, inflation=0, occupancy=True):
+        grid = np.asarray(grid)
+        if occupancy:
+            costs = np.where(grid != 0, -1., float(cls.STRAIGHT_DIST))
+        else:
+            costs = grid.astype(float)
+
+        if inflation > 0:
+            costs[cls.dilate(costs < 0, inflation)] = -1.
+        return costs
+
+    @classmethod
+    def dilate(cls, mask, radius):
+        out = mask.copy()
+        width, height = mask.shape
+        # a shift by a whole side or more moves nothing into the mask, and would wrap
+        # the slices below around
+        r = min(int(radius), max(width, height))
+        for dx in range(-r, r + 1):
+            for dy in range(-r, r + 1):
+                if dx * dx + dy * dy > radius * radius or abs(dx) >= width or abs(dy) >= height:
+                    continue
+                out[max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)] |= \
+                    mask[max(-dx, 0):width + min(-dx, 0), max(-dy, 0):height + min(-dy, 0)]
+        return out
+
+    @classmethod
+    def close_grid(cls, x, y):
+        with np.errstate(invalid='ignore'):
+            return (x == y) | (np.abs(x - y) < 0.00001)
+
+    def cell(self, x, y):
+        return (int(x) + 1) * self.stride + int(y) + 1
+
+    def coords(self, c):
+        x, y = divmod(c, self.stride)
+        return x - 1, y - 1
+
+    def keys_cells(self, xs, ys, g, rhs):
+        # key() for a batch of cells
+        k2 = np.minimum(g, rhs)
+        k1 = k2 + np.where(g > rhs, self.epsilon, 1.) * self.heuristic_cells(xs, ys, self.s_start) + self.k_m
+        k2 = self.tie * k2
+        if self.prune:
+            k2[g < rhs] = -inf
+        return [(round(a, self.KEY_DIGITS), b) for a, b in zip(k1.tolist(), k2.tolist())]
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def heuristic_grid(self, s):
+        xs = np.arange(-1, self.width + 1)[:, None]
+        ys = np.arange(-1, self.height + 1)[None, :]
+        return self.heuristic_cells(xs, ys, s)
+
+    def make_costs(self):
+        costs = np.full((self.width + 2, self.height + 2), -1.)
+        costs[1:-1, 1:-1] = self.STRAIGHT_DIST
+        return costs
+
+    def clear_fields(self):
+        self.costs = self.make_costs()
+
+        self.g = self.heuristic_grid(self.s_goal)
+        self.g[self.costs < 0] = inf
+        self.rhs = self.g.copy()
+
+        # flat views for writing single cells by id; the arrays are only ever updated
+        # in place after this, so the views stay valid
+        self.costs_flat = self.costs.reshape(-1)
+        self.g_flat = self.g.reshape(-1)
+        self.rhs_flat = self.rhs.reshape(-1)
+
+        super().clear_fields()
+
+    def seed_from_costs(self):
+        # Puts the search into the state a fresh planner would reach after update_cell
+        # on every non-default cell followed by expanding the obstacles: blocked cells
+        # get g = rhs = inf, and only the free cells next to them or with their own
+        # cost become inconsistent and go into the open list.
+        blocked = self.costs < 0
+        inner = np.s_[1:-1, 1:-1]
+
+        self.g[:] = self.heuristic_grid(self.s_goal)
+        self.g[blocked] = inf
+
+        self.rhs.fill(inf)
+        for dx, dy in self.NEIGHBOURS:
+            scale = self.DIAGONAL_DIST if dx and dy else self.STRAIGHT_DIST
+            shifted = self.g[1 + dx:self.width + 1 + dx, 1 + dy:self.height + 1 + dy]
+            np.minimum(self.rhs[inner], shifted + scale * self.costs[inner], out=self.rhs[inner])
+        self.rhs[blocked] = inf
+        self.rhs_flat[list(self.goals)] = 0
+        consistent = self.close_grid(self.g, self.rhs)
+        self.rhs[consistent] = self.g[consistent]
+
+        self.reset_search()
+        self.queue_cells(np.flatnonzero(~consistent))
+
+    def reset_search(self):
+        # forgets the open list and everything derived from g and rhs
+        self.k_m = 0
+        self.open_list.clear()
+        self.path = []
+        self.dirty.clear()
+        self.closed.clear()
+        self.incons.clear()
+        self.pending = False
+        self.s_last = State(self.s_start.x, self.s_start.y)
+
+    def queue_cells(self, cells):
+        xs, ys = np.divmod(cells, self.stride)
+        self.open_list.push_many(cells.tolist(),
+                                 self.keys_cells(xs - 1, ys - 1, self.g_flat[cells], self.rhs_flat[cells]))
+        self.count_pushes(len(cells))
+
+    def snapshot(self):
+        blocks = super().snapshot()
+        blocks.update(shape=np.array([self.width, self.height]), costs=self.costs, g=self.g, rhs=self.rhs)
+        return blocks
+
+    def restore(self, blocks):
+        self.width, self.height = blocks['shape'].tolist()
+        self.stride = self.height + 2
+        super().restore(blocks)
+
+    def restore_cells(self, blocks):
+        self.cell_hash = {}
+        self.costs, self.g, self.rhs = blocks['costs'], blocks['g'], blocks['rhs']
+        self.costs_flat = self.costs.reshape(-1)
+        self.g_flat = self.g.reshape(-1)
+        self.rhs_flat = self.rhs.reshape(-1)
+
+    def cost_at(self, c):
+        return self.costs.item(c)
+
+    def costs_cells(self, xs, ys):
+        return self.costs[xs + 1, ys + 1]
+
+    def rhs_at(self, c):
+        if c in self.goals:
+            return 0
+        return self.rhs.item(c)
+
+    def g_at(self, c):
+        return self.g.item(c)
+
+    def make_new_cell(self, c):
+        pass
+
+    def set_g_at(self, c, g):
+        self.g_flat[c] = g
+        self.dirty.add(c)
+
+    def set_rhs_at(self, c, rhs):
+        self.rhs_flat[c] = rhs
+
+    def blocked_at(self, c):
+        return self.costs.item(c) < 0
+
+    def set_cost(self, c, val):
+        self.costs_flat[c] = val
+
+    def update_goal(self, x, y, rebuild=False):
+        if not self.in_bounds(x, y):
+            raise ValueError("goal must lie inside the {w}x{h} grid".format(w=self.width, h=self.height))
+
+        if not rebuild:
+            self.s_goal.x = int(x)
+            self.s_goal.y = int(y)
+            self.goal = self.cell(x, y)
+            self.goals = {self.goal}
+            self.costs_flat[self.start] = self.STRAIGHT_DIST
+            self.costs_flat[self.goal] = self.STRAIGHT_DIST
+            self.seed_from_costs()
+            return
+
+        xs, ys = np.nonzero(self.costs[1:-1, 1:-1] != self.STRAIGHT_DIST)
+        to_add = list(zip(xs.tolist(), ys.tolist(), self.costs[xs + 1, ys + 1].tolist()))
+
+        self.s_goal.x = int(x)
+        self.s_goal.y = int(y)
+
+        self.clear_fields()
+
+        for x, y, val in to_add:
+            self.update_cell(x, y, val)
+
+    def update_cell(self, x, y, val):
+        if self.in_bounds(x, y):
+            super().update_cell(x, y, val)
+
+    def update_cells(self, xs, ys, vals):
+        xs, ys, vals = self.cell_batch(xs, ys, vals, (self.width, self.height))
+        cells = (xs + 1) * self.stride + ys + 1
+        keep = (cells != self.start) & ~np.isin(cells, list(self.goals))
+        cells, vals = cells[keep], vals[keep]
+
+        changed = self.costs_flat[cells] != vals
+        cells = cells[changed]
+        self.costs_flat[cells] = vals[changed]
+        return self.repair_cells(cells)
+
+    def repair_cells(self, cells):
+        # for cells whose cost was just written; goals must not be among them
+        vals = self.costs_flat[cells]
+        xs, ys = np.divmod(cells, self.stride)
+        xs, ys = xs - 1, ys - 1
+        self.dirty.update(cells.tolist())
+
+        # update_vertex for the whole batch at once: a cell's rhs only depends on its
+        # own cost and its successors' g, neither of which update_vertex changes
+        tmp = np.full(len(cells), inf)
+        for step, scale in self.steps:
+            tmp = np.minimum(tmp, self.g_flat[cells + step] + scale * vals)
+        tmp[vals < 0] = inf
+
+        rhs = self.rhs_flat[cells]
+        rhs = np.where(self.close_grid(rhs, tmp), rhs, tmp)
+        self.rhs_flat[cells] = rhs
+
+        g = self.g_flat[cells]
+        inconsistent = ~self.close_grid(g, rhs)
+
+        consistent = cells[~inconsistent].tolist()
+        for c in consistent:
+            self.open_list.remove(c)
+        self.incons.difference_update(consistent)
+
+        queued, xs, ys = cells[inconsistent], xs[inconsistent], ys[inconsistent]
+        self.open_list.push_many(queued.tolist(), self.keys_cells(xs, ys, g[inconsistent], rhs[inconsistent]))
+
+        if self.stats is not None:
+            self.stats.update_vertex += len(cells)
+        self.count_pushes(len(queued))
+        return len(cells)
@@ -0,0 +1,182 @@
+import numpy as np
+from math import inf
+from d_star.grid_d_star import GridDStar
+from d_star.state import State
+
+
+class UnseededGridDStar(GridDStar):
+    # GridDStar for both levels of HierarchicalDStar. Seeding g = rhs = heuristic
+    # as GridDStar does would make every edge of the fine corridor a wall whose
+    # neighbours all have to be raised off their heuristic before the search
+    # settles, and on the coarse level nearly every block has a cost of its own.
+    # Instead it starts like plain D* Lite, with g = rhs = inf and only the goal
+    # queued, so a search only expands cells it reaches from the goal, and the
+    # cells outside the corridor cost nothing.
+
+    def seed_from_costs(self):
+        self.g.fill(inf)
+        self.rhs.fill(inf)
+        goals = np.array(sorted(self.goals))
+        self.rhs_flat[goals] = 0
+
+        self.reset_search()
+        self.queue_cells(goals)
+
+
+class HierarchicalDStar:
+    # Two level planner for large maps. The map is cut into cluster x cluster blocks
+    # and a coarse GridDStar plans over the blocks first. A fine GridDStar then plans
+    # only inside the corridor of blocks around the coarse path; everything outside
+    # the corridor is treated as blocked. If the corridor turns out to be too narrow
+    # it is widened until it covers the whole map.
+    # Both levels stay incremental: update_cell refreshes the cost of the one block
+    # it touches and forwards the change to whichever planner can see it, and the fine
+    # planner is kept for as long as the coarse route stays inside its corridor.
+
+    def __init__(self, costs, x_start, y_start, x_goal, y_goal, cluster=8, corridor=1):
+        self.costs = np.array(costs, dtype=float)
+        self.width, self.height = self.costs.shape
+        self.cluster = cluster
+        self.corridor = corridor
+
+        self.s_start = State(x_start, y_start)
+        self.s_goal = State(x_goal, y_goal)
+        self.path = []
+
+        c = cluster
+        self.coarse_costs = self.block_costs()
+        self.coarse = UnseededGridDStar.from_grid(self.coarse_costs, x_start // c, y_start // c,
+                                                  x_goal // c, y_goal // c, occupancy=False)
+        self.coarse.MAX_STEPS = max(self.coarse.MAX_STEPS, 8 * self.coarse_costs.size)
+
+        self.fine = None
+        self.blocks = None
+        self.spread = corridor
+
+    @classmethod
+    def from_grid(cls, grid, x_start, y_start, x_goal, y_goal, cluster=8, corridor=1, inflation=0, occupancy=True):
+        costs = GridDStar.costs_from_grid(grid, inflation, occupancy)
+        return cls(costs, x_start, y_start, x_goal, y_goal, cluster, corridor)
+
+    def block_costs(self):
+        # block_cost() of every block at once
+        c = self.cluster
+        w, h = -(-self.width // c), -(-self.height // c)
+        costs = np.full((w * c, h * c), np.nan)
+        costs[:self.width, :self.height] = self.costs
+
+        blocks = costs.reshape(w, c, h, c)
+        free = blocks >= 0
+        size = (~np.isnan(blocks)).sum(axis=(1, 3))
+        n = free.sum(axis=(1, 3))
+        total = np.where(free, blocks, 0.).sum(axis=(1, 3))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n > 0, total * size / (n * n), -1.)
+
+    def block_cost(self, cx, cy):
+        # A block is blocked when it has no free cell. Otherwise it costs the mean cost
+        # of its free cells, scaled up by how cluttered it is.
+        c = self.cluster
+        block = self.costs[cx * c:(cx + 1) * c, cy * c:(cy + 1) * c]
+        free = block >= 0
+        if not free.any():
+            return -1.
+        return float(block[free].mean() / free.mean())
+
+    def in_window(self, x, y):
+        x0, y0, x1, y1 = self.window
+        return x0 <= x < x1 and y0 <= y < y1 and self.mask[x - x0, y - y0]
+
+    def build_fine(self):
+        c = self.cluster
+        blocks = np.zeros(self.coarse_costs.shape, dtype=bool)
+        for x, y in self.blocks:
+            blocks[x, y] = True
+        blocks = GridDStar.dilate(blocks, self.spread)
+        self.covered = bool(blocks.all())
+        self.corridor_blocks = blocks
+
+        mask = np.repeat(np.repeat(blocks, c, axis=0), c, axis=1)[:self.width, :self.height]
+        xs, ys = np.nonzero(mask)
+        x0, x1, y0, y1 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+
+        self.window = (int(x0), int(y0), int(x1), int(y1))
+        self.mask = mask[x0:x1, y0:y1]
+        costs = np.where(self.mask, self.costs[x0:x1, y0:y1], -1.)
+
+        self.fine = UnseededGridDStar.from_grid(costs, self.s_start.x - x0, self.s_start.y - y0,
+                                                self.s_goal.x - x0, self.s_goal.y - y0, occupancy=False)
+        self.fine.MAX_STEPS = max(self.fine.MAX_STEPS, 8 * len(xs))
+
+    def replan(self):
+        self.path = []
+        if not self.coarse.replan():
+            return False
+
+        # A new coarse route that still runs inside the corridor keeps the fine
+        # planner, e.g. when the start leaves a block and the route loses it; only a
+        # route that leaves the corridor starts over with a fresh, narrow one.
+        blocks = {(s.x, s.y) for s in self.coarse.get_path()}
+        if blocks != self.blocks:
+            self.blocks = blocks
+            if self.fine is None or not all(self.corridor_blocks[x, y] for x, y in blocks):
+                self.spread = self.corridor
+                self.fine = None
+
+        while True:
+            if self.fine is None:
+                self.build_fine()
+
+            if self.fine.replan():
+                x0, y0 = self.window[:2]
+                self.path = [State(s.x + x0, s.y + y0) for s in self.fine.get_path()]
+                return True
+
+            if self.covered:
+                return False
+            # double rather than step the spread, so a bad coarse route costs a few
+            # rebuilds instead of one per ring of blocks; a spread of the coarse grid's
+            # diagonal reaches every block from any other, so it never needs to grow past it
+            reach = int(np.ceil(np.hypot(self.coarse.width, self.coarse.height)))
+            self.spread = min(max(2 * self.spread, 1), reach)
+            self.fine = None
+
+    def get_path(self):
+        return self.path
+
+    def update_start(self, x, y):
+        self.s_start = State(x, y)
+        self.coarse.update_start(x // self.cluster, y // self.cluster)
+
+        if self.fine is not None and self.in_window(x, y):
+            self.fine.update_start(x - self.window[0], y - self.window[1])
+        else:
+            self.fine = None
+
+    def update_goal(self, x, y):
+        self.s_goal = State(x, y)
+        self.coarse.update_goal(x // self.cluster, y // self.cluster)
+        self.fine = None
+        self.blocks = None
+
+    def update_cell(self, x, y, val):
+        self.update_cells([x], [y], [val])
+
+    def update_cells(self, xs, ys, vals):
+        xs, ys, vals = GridDStar.cell_batch(xs, ys, vals, (self.width, self.height))
+        keep = (xs != self.s_start.x) | (ys != self.s_start.y)
+        keep &= (xs != self.s_goal.x) | (ys != self.s_goal.y)
+        xs, ys, vals = xs[keep], ys[keep], vals[keep]
+        self.costs[xs, ys] = vals
+
+        blocks = set(zip((xs // self.cluster).tolist(), (ys // self.cluster).tolist()))
+        if blocks:
+            cxs, cys = zip(*blocks)
+            self.coarse.update_cells(cxs, cys, [self.block_cost(cx, cy) for cx, cy in blocks])
+
+        if self.fine is not None:
+            x0, y0, x1, y1 = self.window
+            inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+            xs, ys, vals = xs[inside] - x0, ys[inside] - y0, vals[inside]
+            inside = self.mask[xs, ys]
+            self.fine.update_cells(xs[inside], ys[inside], vals[inside])
@@ -0,0 +1,126 @@
+from heapq import heapify
+
+
+class IndexedHeap:
+    # Binary min-heap that knows where every item sits, so keys can be changed or
+    # items removed in place instead of leaving stale entries behind.
+    # Items must be hashable; keys must be mutually comparable (tuples in DStar).
+
+    def __init__(self):
+        self.heap = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def empty(self):
+        return not self.heap
+
+    def clear(self):
+        self.heap = []
+        self.index = {}
+
+    def top(self):
+        key, item = self.heap[0]
+        return item, key
+
+    def top_key(self):
+        return self.heap[0][0]
+
+    def get_key(self, item):
+        return self.heap[self.index[item]][0]
+
+    def push(self, item, key):
+        pos = self.index.get(item)
+        if pos is None:
+            self.heap.append((key, item))
+            self.index[item] = len(self.heap) - 1
+            self.sift_up(len(self.heap) - 1)
+            return
+
+        old_key = self.heap[pos][0]
+        self.heap[pos] = (key, item)
+        if key < old_key:
+            self.sift_up(pos)
+        else:
+            self.sift_down(pos)
+
+    def push_many(self, items, keys):
+        if self.heap:
+            for item, key in zip(items, keys):
+                self.push(item, key)
+            return
+
+        entries = {}
+        for item, key in zip(items, keys):
+            entries[item] = key
+        self.heap = [(key, item) for item, key in entries.items()]
+        heapify(self.heap)
+        self.index = {entry[1]: pos for pos, entry in enumerate(self.heap)}
+
+    def pop(self):
+        key, item = self.heap[0]
+        self.remove_at(0)
+        return item, key
+
+    def remove(self, item):
+        pos = self.index.get(item)
+        if pos is None:
+            return False
+        self.remove_at(pos)
+        return True
+
+    def remove_at(self, pos):
+        heap = self.heap
+        del self.index[heap[pos][1]]
+
+        last = heap.pop()
+        if pos == len(heap):
+            return
+
+        heap[pos] = last
+        self.index[last[1]] = pos
+        if pos > 0 and last[0] < heap[(pos - 1) >> 1][0]:
+            self.sift_up(pos)
+        else:
+            self.sift_down(pos)
+
+    def sift_up(self, pos):
+        heap, index = self.heap, self.index
+        entry = heap[pos]
+        key = entry[0]
+
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if not key < heap[parent][0]:
+                break
+            heap[pos] = heap[parent]
+            index[heap[pos][1]] = pos
+            pos = parent
+
+        heap[pos] = entry
+        index[entry[1]] = pos
+
+    def sift_down(self, pos):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[pos]
+        key = entry[0]
+
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if not heap[child][0] < key:
+                break
+            heap[pos] = heap[child]
+            index[heap[pos][1]] = pos
+            pos = child
+
+        heap[pos] = entry
+        index[entry[1]] = pos
@@ -0,0 +1,108 @@
+from math import hypot, inf
+
+import numpy as np
+
+from d_star.grid_d_star import GridDStar
+
+
+class InflationLayer:
+    # Turns a base cost map (negative cost = obstacle) into the costs the planners
+    # see. Cells within radius of an obstacle are blocked. Cells up to falloff beyond
+    # that have their cost raised by up to weight times, fading linearly to nothing
+    # at radius + falloff. Distances are in cells, between cell centres.
+    # A change to the base map only recomputes the cells within radius + falloff of
+    # it, and only the cells whose effective cost changed are passed on to the
+    # attached planners (anything with update_cells, e.g. GridDStar or DStar).
+
+    def __init__(self, costs, radius, falloff=0., weight=1.):
+        self.base = np.array(costs, dtype=float)
+        self.width, self.height = self.base.shape
+        self.radius = float(radius)
+        self.falloff = float(falloff)
+        self.weight = float(weight)
+
+        self.reach = self.radius + self.falloff
+        self.r = int(self.reach)
+        self.offsets = [(dx, dy, hypot(dx, dy)) for dx in range(-self.r, self.r + 1)
+                        for dy in range(-self.r, self.r + 1) if hypot(dx, dy) <= self.reach]
+
+        # obstacle mask padded by r free cells, so windows never need clipping
+        self.blocked = np.pad(self.base < 0, self.r)
+        self.costs = self.inflate(0, 0, self.width, self.height)
+        self.planners = []
+
+    @classmethod
+    def from_grid(cls, grid, radius, falloff=0., weight=1., occupancy=True):
+        return cls(GridDStar.costs_from_grid(grid, 0, occupancy), radius, falloff, weight)
+
+    def attach(self, planner):
+        # Brings the planner up to date with the current costs first, so it can have
+        # been built from the raw map as well as from layer.costs.
+        xs, ys = np.nonzero(self.costs != planner.STRAIGHT_DIST)
+        if len(xs):
+            planner.update_cells(xs, ys, self.costs[xs, ys])
+        self.planners.append(planner)
+        return planner
+
+    def detach(self, planner):
+        self.planners.remove(planner)
+
+    def inflate(self, x0, y0, x1, y1):
+        # Effective costs of the window [x0, x1) x [y0, y1).
+        r = self.r
+        dist = np.full((x1 - x0, y1 - y0), inf)
+        for dx, dy, d in self.offsets:
+            near = self.blocked[x0 + r + dx:x1 + r + dx, y0 + r + dy:y1 + r + dy]
+            dist[near & (dist > d)] = d
+
+        base = self.base[x0:x1, y0:y1]
+        costs = base.copy()
+        if self.falloff > 0:
+            fading = (dist > self.radius) & (dist <= self.reach)
+            costs[fading] *= 1 + self.weight * (self.reach - dist[fading]) / self.falloff
+        costs[(base < 0) | (dist <= self.radius)] = -1.
+        return costs
+
+    def update_cell(self, x, y, val):
+        return self.update_cells([x], [y], [val])
+
+    def update_cells(self, xs, ys, vals):
+        # Changes base costs and returns the (xs, ys, costs) of the cells whose
+        # effective cost changed, after passing them to the attached planners.
+        xs, ys, vals = GridDStar.cell_batch(xs, ys, vals, (self.width, self.height))
+
+        changed = self.base[xs, ys] != vals
+        xs, ys, vals = xs[changed], ys[changed], vals[changed]
+        if not len(xs):
+            return xs, ys, vals
+
+        self.base[xs, ys] = vals
+        self.blocked[xs + self.r, ys + self.r] = vals < 0
+
+        # one window around each changed cell, or their bounding box when that is
+        # smaller than the windows together
+        r = self.r
+        x0, y0 = np.maximum(xs - r, 0), np.maximum(ys - r, 0)
+        x1, y1 = np.minimum(xs + r + 1, self.width), np.minimum(ys + r + 1, self.height)
+        box = (x0.min(), y0.min(), x1.max(), y1.max())
+        if (box[2] - box[0]) * (box[3] - box[1]) <= np.sum((x1 - x0) * (y1 - y0)):
+            windows = [box]
+        else:
+            windows = zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist())
+
+        out_x, out_y, out_v = [], [], []
+        for wx0, wy0, wx1, wy1 in windows:
+            costs = self.inflate(wx0, wy0, wx1, wy1)
+            cx, cy = np.nonzero(costs != self.costs[wx0:wx1, wy0:wy1])
+            if len(cx):
+                self.costs[cx + wx0, cy + wy0] = costs[cx, cy]
+                out_x.append(cx + wx0)
+                out_y.append(cy + wy0)
+                out_v.append(costs[cx, cy])
+
+        if not out_x:
+            return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+        xs, ys, vals = np.concatenate(out_x), np.concatenate(out_y), np.concatenate(out_v)
+        for planner in self.planners:
+            planner.update_cells(xs, ys, vals)
+        return xs, ys, vals
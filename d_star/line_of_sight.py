@@ -0,0 +1,48 @@
+import numpy as np
+
+# slack for cells the line only grazes, so float error in the slope can't add or
+# drop a cell at an exact corner
+EPS = 1e-9
+
+
+def swept_cells(x0, y0, xs, ys):
+    # Cells whose interior the straight line between the centres of (x0, y0) and
+    # (xs[k], ys[k]) passes through, for all k at once. Returns (k, x, y) arrays,
+    # one entry per cell. Lines through a corner shared by two cells don't count
+    # those two, the same way a diagonal grid move squeezes between them.
+    xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+    dx, dy = xs - x0, ys - y0
+
+    # walk the longer axis u one column at a time; the shorter axis v moves at most
+    # one cell per column, so each column covers one or two cells
+    steep = np.abs(dy) > np.abs(dx)
+    du = np.where(steep, dy, dx)
+    dv = np.where(steep, dx, dy)
+    n = np.abs(du)
+    slope = np.divide(dv, n, out=np.zeros(len(n)), where=n > 0)
+
+    seg = np.repeat(np.arange(len(n)), n + 1)
+    starts = np.cumsum(n + 1) - (n + 1)
+    s = np.arange(len(seg)) - starts[seg]
+
+    lo = np.maximum(s - 0.5, 0) * slope[seg]
+    hi = np.minimum(s + 0.5, n[seg]) * slope[seg]
+    first = np.floor(np.minimum(lo, hi) - 0.5 + EPS).astype(np.int64) + 1
+    last = np.ceil(np.maximum(lo, hi) + 0.5 - EPS).astype(np.int64) - 1
+
+    seg = np.concatenate([seg, seg[last > first]])
+    u = np.concatenate([s, s[last > first]]) * np.sign(du)[seg]
+    v = np.concatenate([first, first[last > first] + 1])
+
+    steep = steep[seg]
+    return seg, x0 + np.where(steep, v, u), y0 + np.where(steep, u, v)
+
+
+def visible(costs, x0, y0, xs, ys, limits):
+    # Whether each line from (x0, y0) to (xs[k], ys[k]) only crosses free cells
+    # costing at most limits[k]. costs(xs, ys) looks up a batch of cell costs. The
+    # cell the lines start from isn't checked.
+    seg, cx, cy = swept_cells(x0, y0, xs, ys)
+    c = costs(cx, cy)
+    bad = ((c < 0) | (c > limits[seg])) & ((cx != x0) | (cy != y0))
+    return np.bincount(seg[bad], minlength=len(limits)) == 0
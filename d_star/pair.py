@@ -1,4 +1,6 @@
 class Pair:
+    __slots__ = ('fst', 'snd', 'fstNone', 'sndNone', 'dualNone')
+
     def __init__(self, fst, snd):
         self.fst = fst
         self.snd = snd
@@ -26,7 +28,7 @@ class Pair:
         if other is None:
             return False
 
-        if self == other:
+        if self is other:
             return True
 
         if not isinstance(other, Pair):
@@ -0,0 +1,40 @@
+import numpy as np
+from numpy.lib import format
+
+# Planner snapshots are one file of consecutive .npy blocks: first an array with
+# the block names, then one block per name. Reading back can memory-map the
+# blocks copy-on-write, so a large map is paged in only where it is touched and
+# writes never reach the file. Blocks smaller than MMAP_BYTES are always read.
+
+MMAP_BYTES = 1 << 20
+
+
+def write_blocks(path, blocks):
+    with open(path, 'wb') as f:
+        np.save(f, np.array(list(blocks)))
+        for value in blocks.values():
+            np.save(f, np.ascontiguousarray(value), allow_pickle=False)
+
+
+def read_blocks(path, mmap=True):
+    blocks = {}
+    with open(path, 'rb') as f:
+        names = np.load(f).tolist()
+        for name in names:
+            version = format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = format.read_array_header_2_0(f)
+            order = 'F' if fortran else 'C'
+            count = int(np.prod(shape))
+            offset = f.tell()
+
+            if mmap and shape and count * dtype.itemsize >= MMAP_BYTES:
+                # a plain ndarray view; it keeps the mapping alive through .base
+                blocks[name] = np.asarray(np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape,
+                                                    order=order))
+                f.seek(offset + count * dtype.itemsize)
+            else:
+                blocks[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape, order=order)
+    return blocks
@@ -0,0 +1,140 @@
+from heapq import heappop, heappush
+from itertools import count
+
+import numpy as np
+
+from d_star.cost_to_go_field import CostToGoField
+from d_star.state import State
+
+
+class StepField(CostToGoField):
+    # Cost-to-go counted in moves: a diagonal move takes one step like a straight
+    # one, as for a robot that covers one cell per time step either way.
+    DIAGONAL_DIST = 1.
+
+
+class OccupancyTable:
+    # Which cells are taken at which time step, e.g. by recorded pedestrians.
+    # Times, rows and cols are parallel integer arrays; end is the last time step
+    # with anything in it, after which the map is static.
+
+    def __init__(self, times, rows, cols, shape):
+        self.width, self.height = shape
+        times, rows, cols = (np.asarray(a, dtype=np.int64).ravel() for a in (times, rows, cols))
+        keep = (rows >= 0) & (rows < self.width) & (cols >= 0) & (cols < self.height)
+        times, rows, cols = times[keep], rows[keep], cols[keep]
+
+        self.taken = set(np.unique((times * self.width + rows) * self.height + cols).tolist())
+        self.end = int(times.max()) if len(times) else -1
+
+    @classmethod
+    def from_paths(cls, paths, shape, step=30, time_step=20):
+        # paths as in src/all_not_ext_paths_with_ids.npy: columns 1, 2 and 3 hold
+        # time, x and y, binned into time steps and grid cells the way the
+        # evaluation notebook does it (row from y, col from x)
+        paths = np.asarray(paths)
+        times = (paths[:, 1] / time_step).astype(int)
+        cols = (paths[:, 2] / step).astype(int)
+        rows = (paths[:, 3] / step).astype(int)
+        return cls(times, rows, cols, shape)
+
+    def occupied(self, time, row, col):
+        return (time * self.width + row) * self.height + col in self.taken
+
+
+class SpaceTimePlanner:
+    # Plans over (row, col, t) around a static grid and an OccupancyTable. Each
+    # time step the robot waits or moves to one of its eight neighbours, and it
+    # must never share a cell with the table; the route that reaches the goal
+    # earliest wins.
+    # The time layers share one static search: a StepField per goal gives every
+    # layer an exact obstacle-aware heuristic, and once the table has ended the
+    # rest of the route is read straight off the field instead of being searched.
+    # Fields are kept between plan calls, so queries towards the same goal only
+    # pay for the static search once, and update_cells repairs them incrementally.
+
+    def __init__(self, grid, table, inflation=0, occupancy=True):
+        self.costs = StepField.costs_from_grid(grid, inflation, occupancy)
+        self.width, self.height = self.costs.shape
+        self.table = table
+        self.fields = {}
+        self.expansions = 0
+
+    def field(self, x_goal, y_goal):
+        field = self.fields.get((x_goal, y_goal))
+        if field is None:
+            field = StepField.from_grid(self.costs, [(x_goal, y_goal)], occupancy=False)
+            self.fields[(x_goal, y_goal)] = field
+        field.compute_shortest_path()
+        return field
+
+    def update_cells(self, xs, ys, vals):
+        xs, ys, vals = StepField.cell_batch(xs, ys, vals, (self.width, self.height))
+        self.costs[xs, ys] = vals
+        for field in self.fields.values():
+            field.update_cells(xs, ys, vals)
+
+    def plan(self, start_time, x_start, y_start, x_goal, y_goal, max_time=200):
+        # Returns the robot's cell at every time step from start_time until it
+        # reaches the goal, as a list of States, or None if that takes longer than
+        # max_time steps. The start cell itself is allowed to be occupied.
+        self.expansions = 0
+        start_time, x_start, y_start, x_goal, y_goal = map(int, (start_time, x_start, y_start, x_goal, y_goal))
+        if not (0 <= x_start < self.width and 0 <= y_start < self.height):
+            return None
+
+        field = self.field(x_goal, y_goal)
+        start = field.cell(x_start, y_start)
+        if field.g_at(start) == np.inf:
+            return None
+
+        moves = [0] + [step for step, _ in field.steps]
+        occupied = self.table.occupied
+        end = self.table.end
+        tie = count()
+
+        # entries are (arrival bound, -t, tie, cell, t); deeper states first on ties
+        t0 = start_time
+        queue = [(t0 + field.g_at(start), -t0, next(tie), start, t0)]
+        parent = {(start, t0): None}
+
+        while queue:
+            f, _, _, c, t = heappop(queue)
+            self.expansions += 1
+
+            if c in field.goals or t >= end:
+                # nothing moves after end, the field knows the rest of the way
+                if f - start_time > max_time:
+                    return None
+                return self.route(field, parent, c, t)
+
+            for step in moves:
+                n = c + step
+                if field.blocked_at(n):
+                    continue
+                h = field.g_at(n)
+                if h == np.inf or t + 1 + h - start_time > max_time:
+                    continue
+                if (n, t + 1) in parent:
+                    continue
+                x, y = field.coords(n)
+                if occupied(t + 1, x, y):
+                    continue
+
+                parent[(n, t + 1)] = (c, t)
+                heappush(queue, (t + 1 + h, -(t + 1), next(tie), n, t + 1))
+
+        return None
+
+    def route(self, field, parent, c, t):
+        cells = []
+        node = (c, t)
+        while node is not None:
+            cells.append(node[0])
+            node = parent[node]
+        cells.reverse()
+
+        path = [State(*field.coords(c)) for c in cells]
+        if c not in field.goals:
+            path += field.path_from(*field.coords(c))[1:]
+        return path
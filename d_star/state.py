@@ -1,6 +1,8 @@
 from d_star.pair import Pair
 
 class State:
+    __slots__ = ('x', 'y', 'k')
+
     def __init__(self, x=0, y=0, k=Pair(0, 0)):
         self.x = x
         self.y = y
@@ -45,7 +47,7 @@ class State:
         return 0
 
     def __hash__(self):
-        return self.x + 34245 * self.y
+        return hash((self.x, self.y))
 
     def __repr__(self):
         return "State: {x}, {y}, ({f}, {s})".format(x=self.x, y=self.y, f=self.k.first(), s=self.k.second())
@@ -0,0 +1,27 @@
+class SearchStats:
+    # Counters filled in by a planner after enable_stats(). With per_call=True the
+    # planner resets them at the start of every replan / iter_path / next_step, so
+    # they describe the last call only; otherwise they add up until reset().
+    # Stale pops are entries popped with an outdated key and pushed back; the
+    # indexed open list never holds duplicate entries, so there are no others.
+    # abort is None, 'max_steps' or 'time_budget' for the last search.
+
+    def __init__(self, per_call=True):
+        self.per_call = per_call
+        self.reset()
+
+    def reset(self):
+        self.expansions = 0
+        self.update_vertex = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.cells_created = 0
+        self.abort = None
+        self.search_time = 0.
+        self.extract_time = 0.
+
+    def __repr__(self):
+        return "expansions: {e}, update_vertex: {u}, pushes: {p}, stale pops: {s}, cells created: {c}, " \
+               "abort: {a}, search: {st:.3f} ms, extract: {et:.3f} ms".format(
+                   e=self.expansions, u=self.update_vertex, p=self.pushes, s=self.stale_pops,
+                   c=self.cells_created, a=self.abort, st=self.search_time * 1000, et=self.extract_time * 1000)
@@ -0,0 +1,225 @@
+from itertools import chain
+from math import inf
+
+import numpy as np
+
+from d_star.d_star import DStar
+
+
+class Tile:
+    # g, rhs and cost of one tile, flat in (x, y) order. used is the planner's
+    # search counter when the tile was last written to.
+    __slots__ = ('g', 'rhs', 'cost', 'used')
+
+    def __init__(self, g, rhs, cost, used):
+        self.g = g
+        self.rhs = rhs
+        self.cost = cost
+        self.used = used
+
+
+class TiledDStar(DStar):
+    # DStar for unbounded maps with a memory cap. Cells live in square tiles of
+    # 2 ** tile_bits cells a side, allocated the first time a cell in them is
+    # written. Before each new search, if there are more than max_tiles tiles, the
+    # least recently written ones are dropped, except the ones within keep tiles
+    # of the start or a goal.
+    # A dropped tile is forgotten: its cells go back to the default cost with
+    # g = rhs = heuristic, the state of cells that were never touched. To keep the
+    # search consistent with that, the cells around the tile are updated and the
+    # tile's own border cells whose neighbours no longer agree with the heuristic
+    # are queued, so the next search repairs whatever the forgotten region still
+    # matters for. Obstacles in a dropped tile are forgotten with it.
+
+    def __init__(self, x_start, y_start, x_goal, y_goal, tile_bits=5, max_tiles=1024, keep=1):
+        self.tile_bits = tile_bits
+        self.tile_size = 1 << tile_bits
+        self.tile_mask = self.tile_size - 1
+        self.max_tiles = max_tiles
+        self.keep = keep
+        self.tick = 0
+
+        super().__init__(x_start, y_start, x_goal, y_goal)
+
+    def tile_key(self, c):
+        b = self.tile_bits
+        return (c >> self.SHIFT >> b) << self.SHIFT | (c & self.MASK) >> b
+
+    def locate(self, c):
+        x, y = c >> self.SHIFT, c & self.MASK
+        b, m = self.tile_bits, self.tile_mask
+        return (x >> b) << self.SHIFT | y >> b, (x & m) << b | (y & m)
+
+    def tile_cells(self, key, local):
+        # cell ids of the given local indices of a tile
+        b = self.tile_bits
+        x0, y0 = (key >> self.SHIFT) << b, (key & self.MASK) << b
+        return [(x0 + (i >> b)) << self.SHIFT | (y0 + (i & self.tile_mask)) for i in local]
+
+    def make_tile(self, key):
+        b = self.tile_bits
+        size = self.tile_size
+        xs = ((key >> self.SHIFT) << b) - self.OFFSET + np.arange(size)
+        ys = ((key & self.MASK) << b) - self.OFFSET + np.arange(size)
+        g = self.heuristic_cells(xs[:, None], ys[None, :], self.s_goal).ravel()
+
+        tile = Tile(g, g.copy(), np.full(size * size, float(self.STRAIGHT_DIST)), self.tick)
+        self.tiles[key] = tile
+        if self.stats is not None:
+            self.stats.cells_created += size * size
+        return tile
+
+    def tile_of(self, c):
+        key, i = self.locate(c)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.make_tile(key)
+        tile.used = self.tick
+        return tile, i
+
+    def clear_fields(self):
+        self.tiles = {}
+        super().clear_fields()
+
+    def memory(self):
+        # bytes held by the tiles
+        return len(self.tiles) * 3 * self.tile_size * self.tile_size * 8
+
+    def cost_at(self, c):
+        key, i = self.locate(c)
+        tile = self.tiles.get(key)
+        if tile is None:
+            return self.STRAIGHT_DIST
+        return tile.cost.item(i)
+
+    def rhs_at(self, c):
+        if c in self.goals:
+            return 0
+        key, i = self.locate(c)
+        tile = self.tiles.get(key)
+        if tile is None:
+            return self.distance(c, self.s_goal)
+        return tile.rhs.item(i)
+
+    def g_at(self, c):
+        key, i = self.locate(c)
+        tile = self.tiles.get(key)
+        if tile is None:
+            return self.distance(c, self.s_goal)
+        return tile.g.item(i)
+
+    def blocked_at(self, c):
+        key, i = self.locate(c)
+        tile = self.tiles.get(key)
+        return tile is not None and tile.cost.item(i) < 0
+
+    def make_new_cell(self, c):
+        self.tile_of(c)
+
+    def set_g_at(self, c, g):
+        tile, i = self.tile_of(c)
+        tile.g[i] = g
+        self.dirty.add(c)
+
+    def set_rhs_at(self, c, rhs):
+        tile, i = self.tile_of(c)
+        tile.rhs[i] = rhs
+
+    def set_cost(self, c, val):
+        tile, i = self.tile_of(c)
+        tile.cost[i] = val
+
+    def custom_costs(self):
+        to_add = []
+        for key, tile in self.tiles.items():
+            local = np.flatnonzero(tile.cost != self.STRAIGHT_DIST).tolist()
+            to_add.extend(zip(self.tile_cells(key, local), tile.cost[local].tolist()))
+        return to_add
+
+    def compute_shortest_path(self, max_steps=None, time_budget=None):
+        if not self.pending:
+            self.tick += 1
+            if len(self.tiles) > self.max_tiles:
+                self.evict()
+        return super().compute_shortest_path(max_steps, time_budget)
+
+    def ring(self, key):
+        last = self.tile_mask
+        local = [i << self.tile_bits | j for i in range(self.tile_size) for j in range(self.tile_size)
+                 if i in (0, last) or j in (0, last)]
+        return self.tile_cells(key, local)
+
+    def evict(self):
+        # Drops the least recently written tiles outside the kept area until at most
+        # max_tiles are left, and queues the repairs described above.
+        anchors = [self.tile_key(c) for c in chain([self.start], self.goals)]
+        keep = self.keep
+
+        def far(key):
+            tx, ty = key >> self.SHIFT, key & self.MASK
+            return all(max(abs(tx - (a >> self.SHIFT)), abs(ty - (a & self.MASK))) > keep for a in anchors)
+
+        candidates = sorted((tile.used, key) for key, tile in self.tiles.items() if far(key))
+        gone = {key for _, key in candidates[:len(self.tiles) - self.max_tiles]}
+        if not gone:
+            return
+        for key in gone:
+            del self.tiles[key]
+
+        tile_key = self.tile_key
+        for c in [c for c in self.open_list.index if tile_key(c) in gone]:
+            self.open_list.remove(c)
+        self.closed = {c for c in self.closed if tile_key(c) not in gone}
+        self.incons = {c for c in self.incons if tile_key(c) not in gone}
+        self.dirty = {c for c in self.dirty if tile_key(c) not in gone}
+
+        border, outside = [], set()
+        for key in gone:
+            for c in self.ring(key):
+                border.append(c)
+                for step, _ in self.steps:
+                    if tile_key(c + step) not in gone:
+                        outside.add(c + step)
+
+        # cells next to the dropped tiles see their heuristic values now; cells
+        # that were never allocated already agree with them
+        for c in outside:
+            if tile_key(c) in self.tiles:
+                self.dirty.add(c)
+                self.update_vertex(c)
+
+        # a border cell whose neighbours outside say more than its heuristic is
+        # queued as it is; expanding it raises g and recomputes rhs like any
+        # other cell whose value went stale
+        pushed = 0
+        for c in border:
+            tmp = inf
+            for step, scale in self.steps:
+                tmp = min(tmp, self.g_at(c + step) + scale * self.STRAIGHT_DIST)
+            if not self.close(tmp, self.distance(c, self.s_goal)):
+                self.open_list.push(c, self.key(c))
+                pushed += 1
+        self.count_pushes(pushed)
+
+    def snapshot(self):
+        blocks = super().snapshot()
+        keys = list(self.tiles)
+        tiles = [self.tiles[key] for key in keys]
+        blocks.update(
+            tiling=np.array([self.tile_bits, self.max_tiles, self.keep, self.tick]),
+            tile_keys=self.ids(keys),
+            tile_used=np.array([tile.used for tile in tiles], dtype=np.int64),
+            tile_values=np.array([(tile.g, tile.rhs, tile.cost) for tile in tiles],
+                                 dtype=float).reshape(-1, 3, self.tile_size * self.tile_size))
+        return blocks
+
+    def restore(self, blocks):
+        self.tile_bits, self.max_tiles, self.keep, self.tick = blocks['tiling'].tolist()
+        self.tile_size = 1 << self.tile_bits
+        self.tile_mask = self.tile_size - 1
+        super().restore(blocks)
+
+    def restore_cells(self, blocks):
+        self.cell_hash = {}
+        self.tiles = {key: Tile(g, rhs, cost, used) for key, used, (g, rhs, cost)
+                      in zip(blocks['tile_keys'].tolist(), blocks['tile_used'].tolist(), blocks['tile_values'])}
@@ -0,0 +1,72 @@
+from heapq import heappop, heappush
+
+
+class TimingWheel:
+    # Buckets items by the time they fall due. One turn of the wheel is size slots
+    # of resolution seconds each; items due further ahead than that wait in far,
+    # grouped by slot, and are moved onto the wheel as it turns. Adding an item is
+    # O(1) and advance only visits the slots that passed, so it costs O(due items)
+    # however many items are pending.
+    # The wheel doesn't deduplicate: an item added twice comes out twice.
+
+    def __init__(self, resolution=0.05, size=256):
+        self.resolution = resolution
+        self.size = size
+        self.slots = [[] for _ in range(size)]
+        self.far = {}
+        self.far_ticks = []
+        self.tick = None
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def tick_of(self, when):
+        return int(when // self.resolution)
+
+    def add(self, item, when):
+        tick = self.tick_of(when)
+        if self.tick is None:
+            self.tick = tick
+        self.count += 1
+
+        if tick < self.tick + self.size:
+            # already due items go into the current slot and come out next advance
+            self.slots[max(tick, self.tick) % self.size].append((item, when))
+        else:
+            if tick not in self.far:
+                self.far[tick] = []
+                heappush(self.far_ticks, tick)
+            self.far[tick].append((item, when))
+
+    def advance(self, now):
+        # Removes and returns the items due at or before now.
+        due = []
+        if self.tick is None:
+            return due
+        now_tick = self.tick_of(now)
+
+        # the current slot is always looked at, it also holds items added late
+        last = max(min(now_tick, self.tick + self.size - 1), self.tick)
+        for tick in range(self.tick, last + 1):
+            slot = self.slots[tick % self.size]
+            if not slot:
+                continue
+            keep = []
+            for item, when in slot:
+                if when <= now:
+                    due.append(item)
+                else:
+                    keep.append((item, when))
+            self.slots[tick % self.size] = keep
+
+        self.tick = max(self.tick, now_tick)
+        while self.far_ticks and self.far_ticks[0] < self.tick + self.size:
+            for item, when in self.far.pop(heappop(self.far_ticks)):
+                if when <= now:
+                    due.append(item)
+                else:
+                    self.slots[self.tick_of(when) % self.size].append((item, when))
+
+        self.count -= len(due)
+        return due
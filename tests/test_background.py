@@ -0,0 +1,76 @@
+# BackgroundPlanner publishing: every input version has to end in a published result,
+# found with the oracle's cost when the goal is reachable and not found when it is
+# walled in, whatever budget the searches are sliced into.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, static_map
+from d_star.background import BackgroundPlanner
+from d_star.d_star import DStar
+from d_star.grid_d_star import GridDStar
+
+BUDGETS = [{}, {'max_steps': 50}, {'time_budget': 0.}]
+
+
+def wall_in(planner, x, y):
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx or dy:
+                planner.update_cell(x + dx, y + dy, -1)
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_unbounded_unreachable_goal(budget):
+    planner = DStar(0, 0, 10, 10)
+    wall_in(planner, 10, 10)
+
+    with BackgroundPlanner(planner, **budget) as background:
+        result = background.wait(timeout=10)
+        assert result is not None and not result.found
+        assert not planner.pending
+
+        # a later change is planned for again, and given up on again
+        version = background.update_cell(3, 3, 2.)
+        result = background.wait(version, timeout=10)
+        assert result is not None and result.version == version and not result.found
+        assert background.latest() is result
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_grid_matches_oracle(budget):
+    grid = static_map()
+    start, goal = far_pair(free_cells(grid, 10, np.random.default_rng(1)))
+    costs = GridDStar.costs_from_grid(grid)
+
+    planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+    planner.MAX_STEPS = grid.size * 8
+
+    with BackgroundPlanner(planner, **budget) as background:
+        result = background.wait(timeout=10)
+        assert result.found
+        assert result.cost == pytest.approx(dijkstra(costs, goal)[start])
+
+        # walling the goal in must replace the stale path with a not found result
+        gx, gy = goal
+        xs, ys = np.meshgrid(np.arange(gx - 1, gx + 2), np.arange(gy - 1, gy + 2), indexing='ij')
+        around = (xs != gx) | (ys != gy)
+        version = background.update_cells(xs[around], ys[around], np.full(8, -1.))
+        result = background.wait(version, timeout=10)
+        assert result is not None and not result.found and result.path == ()
+
+
+def test_update_cells_scalar_cost():
+    grid = static_map()
+    start, goal = far_pair(free_cells(grid, 10, np.random.default_rng(2)))
+    planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+    planner.MAX_STEPS = grid.size * 8
+    cells = [c for c in zip(*np.nonzero(grid == 0)) if c not in (start, goal)]
+    xs, ys = zip(*cells[:2])
+
+    with BackgroundPlanner(planner) as background:
+        background.wait(timeout=10)
+        version = background.update_cells(xs, ys, -1.)
+        result = background.wait(version, timeout=10)
+        assert result is not None and result.version == version
+        assert [planner.cost_at(planner.cell(x, y)) for x, y in zip(xs, ys)] == [-1., -1.]
@@ -0,0 +1,38 @@
+# CostToGoField against the Dijkstra oracle run from all of its goals at once, while
+# cells change between queries. The field must also not keep the cells it settled
+# around in dirty, which only the cached-path trimming of DStar would ever clear.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, static_map
+from d_star.cost_to_go_field import CostToGoField
+from d_star.grid_d_star import GridDStar
+
+
+def oracle(costs, goals):
+    return np.min([dijkstra(costs, goal) for goal in goals], axis=0)
+
+
+def test_matches_oracle_under_churn():
+    grid = static_map(2)
+    rng = np.random.default_rng(0)
+    free = np.argwhere(grid == 0)
+    goals = [tuple(c) for c in free[rng.choice(len(free), 3, replace=False)].tolist()]
+    costs = GridDStar.costs_from_grid(grid)
+    for goal in goals:
+        costs[goal] = CostToGoField.STRAIGHT_DIST
+    field = CostToGoField.from_grid(grid, goals)
+
+    for step in range(5):
+        if step:
+            xs, ys = rng.integers(0, grid.shape[0], 30), rng.integers(0, grid.shape[1], 30)
+            keep = [(x, y) not in goals for x, y in zip(xs.tolist(), ys.tolist())]
+            xs, ys = xs[keep], ys[keep]
+            costs[xs, ys] = np.where(costs[xs, ys] < 0, 1., -1.)
+            field.update_cells(xs, ys, costs[xs, ys])
+
+        best = oracle(costs, goals)
+        for x, y in free[rng.choice(len(free), 20, replace=False)].tolist():
+            assert field.cost_to_go(x, y) == pytest.approx(best[x, y])
+        assert not field.dirty
@@ -0,0 +1,40 @@
+# DStar and GridDStar against the Dijkstra oracle, the same check benchmarks/suite.py
+# runs: the robot walks its path while random cells toggle between free and blocked,
+# and every replan has to find a path exactly when one exists, at the oracle's cost.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_planner, path_cost, random_map
+
+
+@pytest.mark.parametrize('engine', ['DStar', 'GridDStar'])
+@pytest.mark.parametrize('prune', [False, True])
+def test_replanning_matches_oracle(engine, prune):
+    rng = np.random.default_rng(0)
+    grid = random_map(32, 0.2, rng)
+    start, goal = far_pair(free_cells(grid, 10, rng))
+    costs = np.where(grid != 0, -1., 1.)
+    planner = make_planner(engine, grid, start, goal, prune)
+
+    for step in range(15):
+        if step:
+            path = planner.get_path()
+            if len(path) < 2:
+                break
+            start = (path[1].x, path[1].y)
+            planner.update_start(*start)
+
+            xs, ys = rng.integers(0, grid.shape[0], 10), rng.integers(0, grid.shape[1], 10)
+            keep = [(x, y) not in (start, goal) for x, y in zip(xs.tolist(), ys.tolist())]
+            xs, ys = xs[keep], ys[keep]
+            costs[xs, ys] = np.where(costs[xs, ys] < 0, 1., -1.)
+            planner.update_cells(xs, ys, costs[xs, ys])
+
+        best = dijkstra(costs, goal)[start]
+        found = planner.replan()
+        assert found == (best < np.inf)
+        if found:
+            path = [(s.x, s.y) for s in planner.get_path()]
+            assert path[0] == start and path[-1] == goal
+            assert path_cost(costs, path) == pytest.approx(best)
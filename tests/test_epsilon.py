@@ -0,0 +1,69 @@
+# Anytime mode against the Dijkstra oracle: while the robot walks and cells change,
+# epsilon is lowered from 3 to 1. Every path has to be within the bound the planner
+# reports for it, and with epsilon 1 the paths have to be shortest ones.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_dict_planner, path_cost, random_map
+from d_star.grid_d_star import GridDStar
+
+EPSILONS = [3., 3., 2.5, 2., 2., 1.5, 1.2, 1., 1., 1., 1., 1.]
+# free cells cost one of these; on uniform ground the heuristic is exact and even a
+# large epsilon returns shortest paths
+COSTS = [1., 2., 4.]
+
+
+def make_planner(engine, costs, start, goal):
+    if engine == 'DStar':
+        planner = make_dict_planner(costs < 0, start, goal)
+        xs, ys = np.nonzero(costs > 1)
+        planner.update_cells(xs, ys, costs[xs, ys])
+    else:
+        planner = GridDStar.from_grid(costs, start[0], start[1], goal[0], goal[1], occupancy=False)
+    planner.MAX_STEPS = costs.size * 8
+    return planner
+
+
+@pytest.mark.parametrize('engine', ['DStar', 'GridDStar'])
+def test_lowering_epsilon_under_churn(engine):
+    rng = np.random.default_rng(0)
+    grid = random_map(48, 0.2, rng)
+    start, goal = far_pair(free_cells(grid, 10, rng))
+    costs = np.where(grid != 0, -1., rng.choice(COSTS, grid.shape))
+    costs[start] = costs[goal] = 1.
+    planner = make_planner(engine, costs, start, goal)
+
+    worst = 1.
+    for step, epsilon in enumerate(EPSILONS):
+        if step:
+            start = (path[1].x, path[1].y)
+            planner.update_start(*start)
+
+            xs, ys = rng.integers(0, grid.shape[0], 10), rng.integers(0, grid.shape[1], 10)
+            keep = [(x, y) not in (start, goal) for x, y in zip(xs.tolist(), ys.tolist())]
+            xs, ys = xs[keep], ys[keep]
+            costs[xs, ys] = np.where(costs[xs, ys] < 0, rng.choice(COSTS, len(xs)), -1.)
+            planner.update_cells(xs, ys, costs[xs, ys])
+        planner.set_epsilon(epsilon)
+
+        best = dijkstra(costs, goal)[start]
+        found = planner.replan()
+        assert found == (best < np.inf)
+        if not found:
+            break
+
+        path = planner.get_path()
+        cost = path_cost(costs, [(s.x, s.y) for s in path])
+        bound = planner.suboptimality_bound()
+        assert 1. <= bound <= epsilon
+        assert best - 1e-6 <= cost <= bound * best + 1e-6
+        worst = max(worst, cost / best)
+        if epsilon == 1.:
+            assert bound == 1.
+            assert cost == pytest.approx(best)
+        if len(path) < 2:
+            break
+
+    # the inflated heuristic did cut corners before epsilon came down
+    assert worst > 1.01
@@ -0,0 +1,107 @@
+# Expiring marks driven by a fake clock: marks revert on time and not before, a
+# re-mark pushes the expiry back, a cost written over a mark survives its expiry, and
+# after a long jump of the clock nothing is left of the marks.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_planner, path_cost, static_map
+from d_star.grid_d_star import GridDStar
+from d_star.timing_wheel import TimingWheel
+
+ENGINES = ['DStar', 'GridDStar']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+def setup(engine, seed=0):
+    grid = static_map()
+    rng = np.random.default_rng(seed)
+    start, goal = far_pair(free_cells(grid, 10, rng))
+    planner = make_planner(engine, grid, start, goal)
+    planner.clock = FakeClock()
+    cells = [c for c in free_cells(grid, 40, rng) if c not in (start, goal)]
+    return grid, planner, start, goal, cells, rng
+
+
+def cost(planner, x, y):
+    return planner.cost_at(planner.cell(x, y))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_remark_extends_expiry(engine):
+    grid, planner, start, goal, cells, rng = setup(engine)
+    x, y = cells[0]
+
+    planner.mark_cells([x], [y], 5., ttl=1.)
+    planner.clock.now = 0.5
+    planner.mark_cells([x], [y], 7., ttl=1.)
+
+    planner.clock.now = 1.2
+    planner.replan()
+    assert cost(planner, x, y) == 7.
+
+    planner.clock.now = 1.6
+    planner.replan()
+    assert cost(planner, x, y) == planner.STRAIGHT_DIST
+    assert not planner.marks
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_overwritten_mark_is_dropped(engine):
+    grid, planner, start, goal, cells, rng = setup(engine)
+    x, y = cells[0]
+
+    planner.mark_cells([x], [y], 5., ttl=1.)
+    planner.update_cell(x, y, 3.)
+
+    planner.clock.now = 2.
+    planner.replan()
+    assert cost(planner, x, y) == 3.
+    assert not planner.marks
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_clock_jump_clears_marks(engine):
+    grid, planner, start, goal, cells, rng = setup(engine)
+
+    # expiries well past one turn of the wheel, some marks extended, some not
+    for i in range(20):
+        xs, ys = zip(*[cells[j] for j in rng.choice(len(cells), 5, replace=False)])
+        planner.mark_cells(xs, ys, rng.choice([-1., 4.]), ttl=float(rng.uniform(0., 60.)))
+        planner.clock.now += float(rng.uniform(0., 5.))
+        planner.replan()
+
+    planner.clock.now += 1e6
+    assert planner.replan()
+    assert not planner.marks and len(planner.wheel) == 0
+
+    costs = GridDStar.costs_from_grid(grid)
+    for x, y in cells:
+        assert cost(planner, x, y) == costs[x, y]
+    path = [(s.x, s.y) for s in planner.get_path()]
+    assert path_cost(costs, path) == pytest.approx(dijkstra(costs, goal)[start])
+
+
+def test_timing_wheel_never_early():
+    rng = np.random.default_rng(0)
+    wheel = TimingWheel(resolution=0.05, size=16)
+    due = dict(enumerate(rng.uniform(0., 5., 300).tolist()))
+    for item, when in due.items():
+        wheel.add(item, when)
+
+    now, out = 0., set()
+    while now < 6.:
+        now += float(rng.uniform(0., 0.3))
+        for item in wheel.advance(now):
+            assert due[item] <= now and item not in out
+            out.add(item)
+        # everything due by now has come out
+        assert all(item in out for item, when in due.items() if when <= now)
+    assert len(wheel) == 0
@@ -0,0 +1,107 @@
+# HierarchicalDStar against the Dijkstra oracle: it has to find a path exactly when
+# one exists, including when the goal is walled in below the resolution of the
+# coarse level and the corridor has to grow over the whole map.
+
+from math import inf
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, path_cost, static_map
+from d_star.grid_d_star import GridDStar
+from d_star.hierarchical import HierarchicalDStar
+
+
+def tiled_map():
+    return static_map(2)
+
+
+def wall_in(grid, x, y):
+    # blocks the ring of cells around (x, y) while leaving its block partly free
+    grid = grid.copy()
+    grid[max(x - 1, 0):x + 2, max(y - 1, 0):y + 2] = 1
+    grid[x, y] = 0
+    return grid
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_unreachable_goal(seed):
+    grid = tiled_map()
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(grid == 0)
+    (sx, sy), (gx, gy) = free[rng.choice(len(free), size=2, replace=False)]
+    grid = wall_in(grid, gx, gy)
+    grid[sx, sy] = 0
+
+    planner = HierarchicalDStar.from_grid(grid, sx, sy, gx, gy)
+    assert planner.replan() is False
+    assert planner.get_path() == []
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_matches_oracle_reachability(seed):
+    grid = tiled_map()
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(grid == 0)
+    (sx, sy), (gx, gy) = free[rng.choice(len(free), size=2, replace=False)]
+
+    costs = GridDStar.costs_from_grid(grid)
+    best = dijkstra(costs, (gx, gy))[sx, sy]
+    planner = HierarchicalDStar.from_grid(grid, sx, sy, gx, gy)
+
+    assert planner.replan() is bool(best < inf)
+    if best < inf:
+        path = [(s.x, s.y) for s in planner.get_path()]
+        assert path[0] == (sx, sy) and path[-1] == (gx, gy)
+        assert path_cost(costs, path) >= best - 1e-6
+
+
+def test_dilate_any_radius():
+    mask = np.zeros((3, 5), dtype=bool)
+    mask[0, 0] = True
+    for radius in (0, 2, 5, 6, 100):
+        out = GridDStar.dilate(mask, radius)
+        xs, ys = np.indices(mask.shape)
+        assert np.array_equal(out, xs * xs + ys * ys <= radius * radius)
+
+
+class CountingDStar(HierarchicalDStar):
+    def build_fine(self):
+        self.builds = getattr(self, 'builds', 0) + 1
+        super().build_fine()
+
+
+@pytest.mark.parametrize('churn', [0, 10])
+def test_walk_keeps_fine_planner(churn):
+    # Walking the route moves the start out of block after block. The fine planner
+    # must follow it instead of being rebuilt, and stay right under cost changes.
+    grid = static_map(3)
+    rng = np.random.default_rng(0)
+    start, goal = far_pair(free_cells(grid, 20, rng))
+    costs = GridDStar.costs_from_grid(grid)
+    planner = CountingDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+
+    for step in range(80):
+        if step:
+            start = path[1]
+            planner.update_start(*start)
+
+            xs, ys = rng.integers(0, grid.shape[0], churn), rng.integers(0, grid.shape[1], churn)
+            keep = [(x, y) not in (start, goal) for x, y in zip(xs.tolist(), ys.tolist())]
+            xs, ys = xs[keep], ys[keep]
+            costs[xs, ys] = np.where(costs[xs, ys] < 0, 1., -1.)
+            planner.update_cells(xs, ys, costs[xs, ys])
+
+        best = dijkstra(costs, goal)[start]
+        found = planner.replan()
+        assert found is bool(best < inf)
+        if not found:
+            break
+        path = [(s.x, s.y) for s in planner.get_path()]
+        assert path[0] == start and path[-1] == goal
+        assert best - 1e-6 <= path_cost(costs, path) < inf
+        if len(path) < 2:
+            break
+
+    if not churn:
+        assert planner.builds == 1
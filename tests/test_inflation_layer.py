@@ -0,0 +1,24 @@
+# InflationLayer against the Dijkstra oracle run on the layer's own costs: a planner
+# built from the raw map and attached to the layer has to plan on the inflated costs.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, static_map
+from d_star.grid_d_star import GridDStar
+from d_star.inflation_layer import InflationLayer
+
+
+def test_attach_raw_planner():
+    grid = static_map()
+    layer = InflationLayer.from_grid(grid, 1, falloff=2., weight=1.)
+    free = np.argwhere(layer.costs > 0)
+    start, goal = tuple(free[0].tolist()), tuple(free[-1].tolist())
+
+    planner = layer.attach(GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1]))
+    planner.MAX_STEPS = grid.size * 8
+
+    costs = layer.costs.copy()
+    costs[start] = costs[goal] = planner.STRAIGHT_DIST
+    assert planner.replan()
+    assert planner.get_g(planner.s_start) == pytest.approx(dijkstra(costs, goal)[start])
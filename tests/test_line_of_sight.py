@@ -0,0 +1,76 @@
+# Line of sight: swept_cells against an exact rational test of which open cell boxes
+# each segment passes through, and get_waypoints on the repo map.
+
+from fractions import Fraction
+from itertools import product
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import static_map
+from d_star.grid_d_star import GridDStar
+from d_star.line_of_sight import swept_cells
+
+HALF = Fraction(1, 2)
+
+
+def crosses(x0, y0, x1, y1, cx, cy):
+    # Whether the segment between the centres of (x0, y0) and (x1, y1) passes through
+    # the open box of cell (cx, cy): the ranges of t in [0, 1] for which each
+    # coordinate lies strictly inside the box must overlap in more than a point.
+    lo, hi = Fraction(0), Fraction(1)
+    for p, d, c in ((x0, x1 - x0, cx), (y0, y1 - y0, cy)):
+        if d == 0:
+            if abs(p - c) >= HALF:
+                return False
+            continue
+        a, b = Fraction(c - p) - HALF, Fraction(c - p) + HALF
+        a, b = sorted((a / d, b / d))
+        lo, hi = max(lo, a), min(hi, b)
+    return lo < hi
+
+
+def exact_cells(x0, y0, x1, y1):
+    xs = range(min(x0, x1) - 1, max(x0, x1) + 2)
+    ys = range(min(y0, y1) - 1, max(y0, y1) + 2)
+    return {(cx, cy) for cx, cy in product(xs, ys) if crosses(x0, y0, x1, y1, cx, cy)}
+
+
+def test_swept_cells_exact():
+    rng = np.random.default_rng(0)
+    for _ in range(15000 // 50):
+        x0, y0 = rng.integers(-5, 5, 2).tolist()
+        xs, ys = rng.integers(-9, 9, 50), rng.integers(-9, 9, 50)
+        seg, cx, cy = swept_cells(x0, y0, xs, ys)
+        for k, (x1, y1) in enumerate(zip(xs.tolist(), ys.tolist())):
+            got = list(zip(cx[seg == k].tolist(), cy[seg == k].tolist()))
+            assert len(got) == len(set(got))
+            assert set(got) == exact_cells(x0, y0, x1, y1), (x0, y0, x1, y1)
+
+
+@pytest.mark.parametrize('inflation', [0, 1])
+def test_waypoints_on_repo_map(inflation):
+    grid = static_map()
+    rng = np.random.default_rng(0)
+    costs = GridDStar.costs_from_grid(grid, inflation)
+    free = np.argwhere(costs >= 0)
+
+    for _ in range(30):
+        start, goal = [tuple(c) for c in free[rng.choice(len(free), 2, replace=False)].tolist()]
+        planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1], inflation)
+        planner.MAX_STEPS = grid.size * 8
+        if not planner.replan():
+            continue
+
+        path = planner.get_path()
+        waypoints = planner.get_waypoints()
+        assert waypoints[0] == path[0] and waypoints[-1] == path[-1]
+        assert len(waypoints) <= len(path)
+
+        for a, b in zip(waypoints, waypoints[1:]):
+            seg, cx, cy = swept_cells(a.x, a.y, [b.x], [b.y])
+            assert (costs[cx, cy] >= 0).all()
+
+        def length(states):
+            return sum(np.hypot(u.x - v.x, u.y - v.y) for u, v in zip(states, states[1:]))
+        assert length(waypoints) <= length(path) + 1e-9
@@ -0,0 +1,105 @@
+# The NumPy port of NetworkVP_rnn on the repo's checkpoint: the exported weights,
+# the shape of the policy, batched against one-at-a-time prediction, and a float64
+# reference written out row by row the way TF's LSTMCell and dense layers compute it.
+
+import os
+
+import numpy as np
+import pytest
+
+from network_config import Actions, Config
+from network_np import NetworkVP_np, export_weights
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CHECKPOINT = os.path.join(ROOT, 'checkpoints', 'network_01900000')
+
+HIDDEN = 64
+SHAPES = {
+    'layer1/kernel': (Config.HOST_AGENT_STATE_SIZE + HIDDEN, 256), 'layer1/bias': (256,),
+    'layer2/kernel': (256, 256), 'layer2/bias': (256,),
+    'fullyconnected1/kernel': (256, 256), 'fullyconnected1/bias': (256,),
+    'logits_p/kernel': (256, 11), 'logits_p/bias': (11,),
+    'logits_v/kernel': (256, 1), 'logits_v/bias': (1,),
+    'rnn/lstm_cell/kernel': (Config.OTHER_AGENT_FULL_OBSERVATION_LENGTH + HIDDEN, 4 * HIDDEN),
+    'rnn/lstm_cell/bias': (4 * HIDDEN,),
+}
+
+
+@pytest.fixture(scope='module')
+def weights(tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp('weights') / 'network_01900000.npz')
+    names = export_weights(CHECKPOINT, filename)
+    return filename, names
+
+
+@pytest.fixture(scope='module')
+def observations():
+    # random observations with every number of other agents, from none to all
+    rng = np.random.default_rng(0)
+    n = 200
+    obs = np.zeros((n, Config.FULL_STATE_LENGTH))
+    obs[:, 0] = np.arange(n) % (Config.MAX_NUM_OTHER_AGENTS_OBSERVED + 1)
+    obs[:, 1] = rng.uniform(0.5, 10.0, n)
+    obs[:, 2] = rng.uniform(-np.pi, np.pi, n)
+    obs[:, 3] = rng.uniform(0.2, 2.0, n)
+    obs[:, 4] = rng.uniform(0.2, 1.5, n)
+    first = Config.FIRST_STATE_INDEX + Config.HOST_AGENT_STATE_SIZE
+    others = obs[:, first:].reshape(n, Config.MAX_NUM_OTHER_AGENTS_OBSERVED, -1)
+    others[:] = rng.uniform(-3., 3., others.shape)
+    for row, count in zip(others, obs[:, 0].astype(int)):
+        row[count:] = 0.
+    return obs
+
+
+def reference_p(filename, x):
+    # float64, one row and one time step at a time
+    w = {name: np.asarray(value, dtype=np.float64) for name, value in np.load(filename).items()}
+    sigmoid = lambda z: 1. / (1. + np.exp(-z))
+    x_normalized = (x - Config.NN_INPUT_AVG_VECTOR) / Config.NN_INPUT_STD_VECTOR
+    first = Config.FIRST_STATE_INDEX + Config.HOST_AGENT_STATE_SIZE
+
+    out = []
+    for row, raw in zip(x_normalized, x):
+        h, c = np.zeros(HIDDEN), np.zeros(HIDDEN)
+        others = row[first:].reshape(Config.MAX_NUM_OTHER_AGENTS_OBSERVED, -1)
+        for t in range(int(raw[0])):
+            z = np.concatenate([others[t], h]) @ w['rnn/lstm_cell/kernel'] + w['rnn/lstm_cell/bias']
+            i, j, f, o = np.split(z, 4)
+            c = sigmoid(f + 1.) * c + sigmoid(i) * np.tanh(j)
+            h = sigmoid(o) * np.tanh(c)
+
+        a = np.concatenate([row[Config.FIRST_STATE_INDEX:first], h])
+        for name in ('layer1', 'layer2', 'fullyconnected1'):
+            a = np.maximum(a @ w[name + '/kernel'] + w[name + '/bias'], 0.)
+        logits = a @ w['logits_p/kernel'] + w['logits_p/bias']
+        p = np.exp(logits - logits.max())
+        p /= p.sum()
+        out.append((p + Config.MIN_POLICY) / (1. + Config.MIN_POLICY * len(p)))
+    return np.array(out)
+
+
+def test_export_weights(weights):
+    filename, names = weights
+    assert names == sorted(SHAPES)
+    saved = np.load(filename)
+    assert {name: saved[name].shape for name in saved.files} == SHAPES
+
+
+def test_policy_rows(weights, observations):
+    nn = NetworkVP_np(weights[0], Actions().num_actions)
+    probs, best = nn.predict_batch(observations, batch_size=16)
+
+    assert probs.shape == (len(observations), Actions().num_actions)
+    assert np.allclose(probs.sum(axis=1), 1., atol=1e-5)
+    floor = Config.MIN_POLICY / (1. + Config.MIN_POLICY * nn.num_actions)
+    assert (probs >= floor * (1 - 1e-5)).all()
+    assert np.array_equal(best, probs.argmax(axis=1))
+
+    # rows with different agent counts in one batch must not affect each other
+    one = np.vstack([nn.predict_p(row[None]) for row in observations])
+    assert np.allclose(one, probs, rtol=1e-4, atol=1e-6)
+
+
+def test_matches_float64_reference(weights, observations):
+    nn = NetworkVP_np(weights[0], Actions().num_actions)
+    assert np.allclose(nn.predict_p(observations), reference_p(weights[0], observations), atol=1e-5)
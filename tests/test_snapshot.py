@@ -0,0 +1,83 @@
+# Snapshots: a planner saved in the middle of a budgeted search and loaded back, read
+# or memory-mapped, has to finish that search exactly as the original does.
+
+import numpy as np
+import pytest
+
+import d_star.snapshot
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_dict_planner, path_cost, static_map
+from d_star.cost_to_go_field import CostToGoField
+from d_star.d_star import DStar
+from d_star.grid_d_star import GridDStar
+from d_star.tiled_d_star import TiledDStar
+
+ENGINES = [DStar, GridDStar, TiledDStar, CostToGoField]
+
+
+def make_planner(cls, grid, start, goal):
+    if cls is DStar:
+        planner = make_dict_planner(grid, start, goal)
+    elif cls is TiledDStar:
+        planner = TiledDStar(start[0], start[1], goal[0], goal[1], tile_bits=3)
+        blocked = np.pad(grid != 0, 1, constant_values=True)
+        xs, ys = np.nonzero(blocked)
+        planner.update_cells(xs - 1, ys - 1, -1.)
+    elif cls is CostToGoField:
+        planner = CostToGoField.from_grid(grid, [goal])
+    else:
+        planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+    planner.MAX_STEPS = grid.size * 8
+    return planner
+
+
+def finish(planner, start):
+    # the path and bound a robot at start gets once the search is done
+    found = planner.replan()
+    if isinstance(planner, CostToGoField):
+        path = planner.path_from(*start)
+    else:
+        assert found
+        path = planner.get_path()
+    return [(s.x, s.y) for s in path], planner.suboptimality_bound()
+
+
+@pytest.mark.parametrize('cls', ENGINES)
+@pytest.mark.parametrize('mmap', [False, True])
+def test_round_trip_pending_search(cls, mmap, tmp_path, monkeypatch):
+    if mmap:
+        # map every block, however small
+        monkeypatch.setattr(d_star.snapshot, 'MMAP_BYTES', 0)
+    grid = static_map()
+    start, goal = far_pair(free_cells(grid, 10, np.random.default_rng(0)))
+    planner = make_planner(cls, grid, start, goal)
+    if cls is not CostToGoField:
+        planner.set_epsilon(2.)
+
+    planner.replan(max_steps=50)
+    assert planner.pending
+
+    path = str(tmp_path / 'planner.npy')
+    planner.save(path)
+    loaded = cls.load(path, mmap=mmap)
+    loaded.MAX_STEPS = planner.MAX_STEPS
+    assert loaded.pending
+
+    expected = finish(planner, start)
+    assert finish(loaded, start) == expected
+
+    costs = GridDStar.costs_from_grid(grid)
+    best = dijkstra(costs, goal)[start]
+    cells, bound = expected
+    assert cells[0] == start and cells[-1] == goal
+    assert path_cost(costs, cells) <= bound * best + 1e-6
+
+
+def test_load_wrong_class(tmp_path):
+    grid = static_map()
+    start, goal = far_pair(free_cells(grid, 10, np.random.default_rng(0)))
+    path = str(tmp_path / 'planner.npy')
+    make_planner(GridDStar, grid, start, goal).save(path)
+
+    for cls in (DStar, TiledDStar, CostToGoField):
+        with pytest.raises(ValueError):
+            cls.load(path)
@@ -0,0 +1,67 @@
+# TiledDStar with a tile cap well below the size of the map: the robot walks its path
+# while cells change, tiles get evicted and their obstacles forgotten, and every path
+# must still be a shortest one on what the planner remembers, its own cost_at view.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, path_cost, static_map
+from d_star.tiled_d_star import TiledDStar
+
+# cells around the map included in the oracle's view of the unbounded world
+MARGIN = 16
+
+
+class CountingTiledDStar(TiledDStar):
+    # records how many tiles each eviction leaves
+    def evict(self):
+        super().evict()
+        self.evicted_to.append(len(self.tiles))
+
+
+def remembered_costs(planner, width, height):
+    xs, ys = np.arange(-MARGIN, width + MARGIN), np.arange(-MARGIN, height + MARGIN)
+    return np.array([[planner.cost_at(planner.cell(x, y)) for y in ys.tolist()] for x in xs.tolist()])
+
+
+# the cap has to leave room for the tiles kept around the start and the goal,
+# 2 * 3 * 3 with keep=1
+@pytest.mark.parametrize('max_tiles', [20, 24])
+def test_walk_with_eviction(max_tiles):
+    grid = static_map()
+    width, height = grid.shape
+    rng = np.random.default_rng(0)
+    start, goal = far_pair(free_cells(grid, 10, rng))
+
+    planner = CountingTiledDStar(start[0], start[1], goal[0], goal[1], tile_bits=3, max_tiles=max_tiles)
+    planner.evicted_to = []
+    planner.MAX_STEPS = grid.size * 64
+    xs, ys = np.nonzero(np.pad(grid != 0, 1, constant_values=True))
+    planner.update_cells(xs - 1, ys - 1, -1.)
+    assert len(planner.tiles) > max_tiles
+
+    for step in range(60):
+        if step:
+            start = (path[1].x, path[1].y)
+            planner.update_start(*start)
+
+            xs, ys = rng.integers(0, width, 5), rng.integers(0, height, 5)
+            keep = [(x, y) not in (start, goal) for x, y in zip(xs.tolist(), ys.tolist())]
+            planner.update_cells(xs[keep], ys[keep], rng.choice([-1., 1., 3.], int(np.sum(keep))))
+
+        found = planner.replan()
+        # the cap holds when the search starts; the search itself only adds the few
+        # tiles it writes to
+        assert planner.evicted_to and planner.evicted_to[-1] == max_tiles
+        assert len(planner.tiles) <= max_tiles + 8
+
+        costs = remembered_costs(planner, width, height)
+        best = dijkstra(costs, (goal[0] + MARGIN, goal[1] + MARGIN))[start[0] + MARGIN, start[1] + MARGIN]
+        assert found == (best < np.inf)
+        if not found:
+            break
+        path = planner.get_path()
+        cells = [(s.x + MARGIN, s.y + MARGIN) for s in path]
+        assert path_cost(costs, cells) == pytest.approx(best)
+        if len(path) < 2:
+            break
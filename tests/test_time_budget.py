@@ -0,0 +1,44 @@
+# Resumable searches, for the planners and a CostToGoField: a replan that runs out of
+# time_budget leaves the search pending, and repeated calls, however small the budget,
+# must make progress and end on a path as cheap as the Dijkstra oracle's.
+
+import numpy as np
+import pytest
+
+from benchmarks.oracle import dijkstra, far_pair, free_cells, make_dict_planner, path_cost, static_map
+from d_star.cost_to_go_field import CostToGoField
+from d_star.grid_d_star import GridDStar
+
+
+def make_planner(engine, grid, start, goal):
+    if engine == 'DStar':
+        planner = make_dict_planner(grid, start, goal)
+    elif engine == 'CostToGoField':
+        planner = CostToGoField.from_grid(grid, [goal])
+    else:
+        planner = GridDStar.from_grid(grid, start[0], start[1], goal[0], goal[1])
+    planner.MAX_STEPS = grid.size * 8
+    return planner
+
+
+@pytest.mark.parametrize('engine', ['DStar', 'GridDStar', 'CostToGoField'])
+def test_zero_budget_makes_progress(engine):
+    grid = static_map()
+    start, goal = far_pair(free_cells(grid, 10, np.random.default_rng(0)))
+    costs = GridDStar.costs_from_grid(grid)
+    best = dijkstra(costs, goal)[start]
+
+    planner = make_planner(engine, grid, start, goal)
+    stats = planner.enable_stats(per_call=False)
+
+    calls = 0
+    while not planner.replan(time_budget=0.):
+        assert planner.pending
+        calls += 1
+        assert calls <= grid.size
+    assert calls > 0 and stats.expansions > 0
+
+    # a field's own replan walks from its goal, the robot queries it with path_from
+    path = planner.path_from(*start) if engine == 'CostToGoField' else planner.get_path()
+    path = [(s.x, s.y) for s in path]
+    assert path_cost(costs, path) == pytest.approx(best)